@@ -18,9 +18,14 @@ def init_db():
             location TEXT NOT NULL,
             reminder_times TEXT NOT NULL,  -- stored as JSON string
             timezone TEXT NOT NULL,
-            created_at TEXT NOT NULL
+            created_at TEXT NOT NULL,
+            updated_at TEXT
         )
     """)
+    # Older databases predate updated_at (used by agents_version)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(agents)")}
+    if "updated_at" not in columns:
+        cursor.execute("ALTER TABLE agents ADD COLUMN updated_at TEXT")
     conn.commit()
     conn.close()
 
@@ -32,9 +37,9 @@ def add_agent(user_id, location, reminder_times, tz_string):
     now = datetime.now(timezone.utc).isoformat()
 
     cursor.execute("""
-        INSERT INTO agents (user_id, location, reminder_times, timezone, created_at)
-        VALUES (?, ?, ?, ?, ?)
-    """, (user_id, location, json.dumps(reminder_times), tz_string, now))
+        INSERT INTO agents (user_id, location, reminder_times, timezone, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (user_id, location, json.dumps(reminder_times), tz_string, now, now))
     conn.commit()
     conn.close()
 
@@ -43,7 +48,7 @@ def add_agent(user_id, location, reminder_times, tz_string):
 def get_agents():
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM agents")
+    cursor.execute("SELECT id, user_id, location, reminder_times, timezone, created_at FROM agents")
     rows = cursor.fetchall()
     conn.close()
 
@@ -60,6 +65,16 @@ def get_agents():
     return agents
 
 
+def agents_version():
+    """Cheap change token for the agents table: row count, newest id, latest update."""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute("SELECT count(*), max(id), max(updated_at) FROM agents")
+    count, max_id, last_update = cursor.fetchone()
+    conn.close()
+    return f"{count}-{max_id}-{last_update}"
+
+
 def delete_agent(agent_id):
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
@@ -72,8 +87,8 @@ def update_agent(agent_id, new_times):
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute("""
-        UPDATE agents SET reminder_times = ? WHERE id = ?
-    """, (json.dumps(new_times), agent_id))
+        UPDATE agents SET reminder_times = ?, updated_at = ? WHERE id = ?
+    """, (json.dumps(new_times), datetime.now(timezone.utc).isoformat(), agent_id))
     conn.commit()
     conn.close()
 
@@ -4,13 +4,25 @@
 # lookup of resolver_result["original_prompt"] will succeed.
 
 import re
+import threading
 from typing import Dict, Optional, Tuple
+from cachetools import LRUCache
 from geo_utils_helper import reverse_geolocate
 
+# Compiled once at import; resolve_city_context runs on every /prompt request.
+# See step 2 in resolve_city_context for a breakdown of _EXPLICIT_IN_RE.
+_EXPLICIT_IN_RE = re.compile(r"\b in\s+([A-Za-zÀ-ÖØ-öø-ÿ'’\- ]+?)(?=[?!.;,]|$)", re.IGNORECASE)
+_NESTED_IN_RE = re.compile(r"\s+in\s+", re.IGNORECASE)
+_DANGLING_IN_RE = re.compile(r"\b in\b\s*(?=[,?!.;]|$)", re.IGNORECASE)
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,?!.;])")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+
+_FILLER_TOKENS = frozenset({"here", "outside", "it", "this", "that", "now", "today", "tomorrow"})
+
 def _cleanup_dangling_in(text: str) -> str:
-    cleaned = re.sub(r"\b in\b\s*(?=[,?!.;]|$)", "", text, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s+([,?!.;])", r"\1", cleaned)
-    cleaned = re.sub(r"\s{2,}", " ", cleaned)
+    cleaned = _DANGLING_IN_RE.sub("", text)
+    cleaned = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", cleaned)
+    cleaned = _MULTI_SPACE_RE.sub(" ", cleaned)
     return cleaned.strip()
 
 def resolve_city_context(prompt_text: str, location: Optional[Dict] = None) -> Tuple[str, Optional[str], Dict]:
@@ -65,19 +77,14 @@ def resolve_city_context(prompt_text: str, location: Optional[Dict] = None) -> T
     #
     #    After capturing, we filter out obvious filler words like "here", "outside", etc.
     # --------------------------------------------------------------------------
-    explicit_pattern = re.compile(
-        r"\b in\s+([A-Za-zÀ-ÖØ-öø-ÿ'’\- ]+?)(?=[?!.;,]|$)",
-        flags=re.IGNORECASE
-    )
-    match = explicit_pattern.search(text)
+    match = _EXPLICIT_IN_RE.search(text)
     if match:
         candidate = match.group(1).strip()          # e.g. "Paris" or "New York"
-        candidate = re.split(r"\s+in\s+", candidate, maxsplit=1, flags=re.IGNORECASE)[0].strip()
+        candidate = _NESTED_IN_RE.split(candidate, maxsplit=1)[0].strip()
         candidate_title = candidate.title()         # Normalize to Title Case ("new york" → "New York")
 
         # Reject filler tokens like "here", "outside", etc.
-        filler_tokens = {"here", "outside", "it", "this", "that", "now", "today", "tomorrow"}
-        if candidate_title.lower() not in filler_tokens:
+        if candidate_title.lower() not in _FILLER_TOKENS:
             resolved_city = candidate_title
             metadata["resolution_method"] = "explicit_regex"
             metadata["resolved_city"] = resolved_city
@@ -86,7 +93,7 @@ def resolve_city_context(prompt_text: str, location: Optional[Dict] = None) -> T
             start, end = match.span()
             modified_prompt = (text[:start] + text[end:]).strip()
             # Collapse any accidental double spaces left behind
-            modified_prompt = re.sub(r"\s{2,}", " ", modified_prompt).strip()
+            modified_prompt = _MULTI_SPACE_RE.sub(" ", modified_prompt).strip()
             modified_prompt = _cleanup_dangling_in(modified_prompt)
 
             return modified_prompt, resolved_city, metadata
@@ -126,6 +133,43 @@ def resolve_city_context(prompt_text: str, location: Optional[Dict] = None) -> T
     modified_prompt = _cleanup_dangling_in(modified_prompt)
     return modified_prompt, None, metadata
 
+def coords_only_context() -> Tuple[str, Optional[str], Dict]:
+    """
+    What resolve_city_context() returns for an empty prompt with no location name
+    (the auto-load case), built directly so /prompt can skip the resolver.
+    """
+    metadata = {
+        "original_prompt": "",
+        "resolution_method": "none",
+        "injected_location": False,
+        "injected_location_name": None,
+        "resolved_city": None,
+        "fast_path": True,
+    }
+    return "", None, metadata
+
+# Auto-load requests repeat the same (prompt, location name) pair constantly.
+# The resolver is pure, so results never go stale; a redeploy resets the cache.
+_resolve_cache = LRUCache(maxsize=5000)
+_resolve_lock = threading.Lock()
+
+def cached_resolve_city_context(prompt_text: str, location: Optional[Dict] = None) -> Tuple[str, Optional[str], Dict]:
+    """
+    resolve_city_context() memoized on its only inputs: the prompt and location["name"].
+    Lat/lon never influence the result, so they're left out of the key.
+    """
+    name = location.get("name") if isinstance(location, dict) else None
+    key = (prompt_text, name)
+    with _resolve_lock:
+        cached = _resolve_cache.get(key)
+    if cached is None:
+        cached = resolve_city_context(prompt_text, location)
+        with _resolve_lock:
+            _resolve_cache[key] = cached
+    modified_prompt, resolved_city, metadata = cached
+    # Callers may annotate metadata; hand out a copy so the cached entry stays clean
+    return modified_prompt, resolved_city, dict(metadata)
+
 # ------------------------------------------------------------------------------
 # Re-create preprocess_prompt_for_weather so process_app_prompt.py finds all keys it expects.
 # In particular, process_app_prompt.py does things like:
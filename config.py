@@ -3,9 +3,11 @@ import os
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
 
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "").strip()
 WEATHERAPI_KEY = os.getenv("WEATHERAPI_KEY", "").strip()
 
-ENV = os.getenv("ENV", "prod").strip()
+ENV = os.getenv("ENV", "prod").strip().lower()
 DEFAULT_UNITS = os.getenv("UNITS", "metric").strip()
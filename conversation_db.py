@@ -44,15 +44,13 @@ def store_exchange(session_id: str, user_msg: str, assistant_msg: str) -> None:
     """Persist one user+assistant exchange; evict oldest messages when over cap."""
     now = datetime.now(timezone.utc).isoformat()
     with _conn() as conn:
-        conn.execute(
-            "INSERT INTO conversation_history "
-            "(session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
-            (session_id, "user", user_msg, now),
-        )
-        conn.execute(
+        conn.executemany(
             "INSERT INTO conversation_history "
             "(session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
-            (session_id, "assistant", assistant_msg, now),
+            (
+                (session_id, "user", user_msg, now),
+                (session_id, "assistant", assistant_msg, now),
+            ),
         )
         # FIFO eviction
         count = conn.execute(
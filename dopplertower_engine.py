@@ -3,8 +3,11 @@
 # NEW: Integrated news context fetching for location-aware personality responses
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from functools import wraps
+from functools import lru_cache, wraps
 from openai import OpenAI
 import os
 import math
@@ -23,7 +26,7 @@ from llm_cache import (
     save_cached_response,
     weather_identity,
 )
-from llm_quota import check_llm_quota, quota_context_from_request, record_llm_usage
+from llm_quota import check_llm_quota, llm_concurrency, quota_context_from_request, record_llm_usage
 from fallback_roasts import build_fallback_roast
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
@@ -33,7 +36,37 @@ WEATHERAPI_KEY = os.getenv("WEATHERAPI_KEY")
 OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5"
 WEATHERAPI_URL = "http://api.weatherapi.com/v1"
 
-from config import OPENAI_MODEL  # shared config
+# Each gthread request thread (GUNICORN_THREADS, see gunicorn.conf.py) fans out six
+# upstream fetches; size the fetch pool so concurrent requests never queue behind
+# each other's network calls.
+_FETCHES_PER_REQUEST = 6
+_FETCH_WORKERS = int(os.getenv("GUNICORN_THREADS", "16")) * _FETCHES_PER_REQUEST
+
+# Pooled session for OpenWeather / WeatherAPI: the parallel fetches per prompt
+# reuse keep-alive connections instead of opening a new socket each. Pool sized to
+# _fetch_executor so no worker waits on a connection.
+_weather_http = requests.Session()
+_weather_http_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=_FETCH_WORKERS,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    ),
+)
+_weather_http.mount("https://", _weather_http_adapter)
+_weather_http.mount("http://", _weather_http_adapter)
+
+from config import OPENAI_MAX_RETRIES, OPENAI_MODEL, OPENAI_TIMEOUT  # shared config
+
+
+@lru_cache(maxsize=1)
+def _openai_client() -> OpenAI:
+    """One pooled client per process, with bounded timeout/retries so a stalled call can't pin a worker."""
+    return OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
 
 # ─── TTL Cache ────────────────────────────────────────────────────────────────
 _CACHE_TTL = 600  # 10 minutes
@@ -58,7 +91,7 @@ def _ttl_cache(name: str, ttl: int = _CACHE_TTL):
                     _stats["by_endpoint"][name]["hits"] += 1
                     print(f"💾 Cache hit: {name} ({round(lat, 2):.2f}, {round(lon, 2):.2f})")
                     return data
-                del _cache[key]
+                _cache.pop(key, None)  # another thread may have evicted it already
             _stats["misses"] += 1
             _stats["by_endpoint"][name]["misses"] += 1
             data = fn(lat, lon)
@@ -81,6 +114,9 @@ def cache_stats() -> dict:
         "by_endpoint": _stats["by_endpoint"],
     }
 
+# Upstream weather fetches for one request are independent, so they run side by side.
+_fetch_executor = ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="weather-fetch")
+
 # ─────────────────────────────────────────────────────────────────────────────
 
 # Setup logger
@@ -227,17 +263,17 @@ def convert_wind_speed(mps):
 @_ttl_cache("openweather_current")
 def get_openweather_current(lat, lon):
     url = f"{OPENWEATHER_URL}/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-    return requests.get(url).json()
+    return _weather_http.get(url).json()
 
 @_ttl_cache("openweather_forecast")
 def get_openweather_forecast(lat, lon):
     url = f"{OPENWEATHER_URL}/forecast?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-    return requests.get(url).json()
+    return _weather_http.get(url).json()
 
 @_ttl_cache("air_quality")
 def get_air_quality(lat, lon):
     url = f"{OPENWEATHER_URL}/air_pollution?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}"
-    data = requests.get(url).json()
+    data = _weather_http.get(url).json()
     aqi_map = {1: "🟢 Good", 2: "🟡 Fair", 3: "🟠 Moderate", 4: "🔴 Poor 😷", 5: "🟣 Very Poor ☠️"}
     if data.get("list"):
         return aqi_map.get(data["list"][0]["main"]["aqi"], "Unknown")
@@ -246,7 +282,7 @@ def get_air_quality(lat, lon):
 @_ttl_cache("weather_alerts")
 def get_weather_alerts(lat, lon):
     url = f"{WEATHERAPI_URL}/alerts.json?key={WEATHERAPI_KEY}&q={lat},{lon}"
-    response = requests.get(url)
+    response = _weather_http.get(url)
 
     try:
         data = response.json()
@@ -263,7 +299,7 @@ def get_weather_alerts(lat, lon):
 def get_three_day_forecast(lat, lon):
     url = f"{WEATHERAPI_URL}/forecast.json?key={WEATHERAPI_KEY}&q={lat},{lon}&days=3"
     try:
-        return requests.get(url, timeout=8).json()
+        return _weather_http.get(url, timeout=8).json()
     except Exception:
         return {}
 
@@ -320,7 +356,7 @@ def get_hourly_forecast(lat: float, lon: float) -> list:
 
 def get_historical_weather(lat, lon, date_str):
     url = f"{WEATHERAPI_URL}/history.json?key={WEATHERAPI_KEY}&q={lat},{lon}&dt={date_str}"
-    response = requests.get(url)
+    response = _weather_http.get(url)
     return response.json()
 
 def generate_summary_prompt(user_prompt, current, forecast_lines, aqi, alerts, tone="sarcastic"):
@@ -436,28 +472,35 @@ def get_full_weather_summary_by_coords(
         structured: If True, returns format_structured_weather_response() output
                    If False, returns legacy format (backward compatible)
     """
-    from geo_utils_helper import reverse_geolocate
+    from geo_utils_helper import cached_reverse_geolocate
 
     # Validate
     if lat is None or lon is None:
         return {"error": "Missing coordinates."}
 
-    # Pull data by coords
-    current = get_openweather_current(lat, lon)
-    forecast = get_openweather_forecast(lat, lon)
-    aqi = get_air_quality(lat, lon)
-    alerts = get_weather_alerts(lat, lon)
-    forecast_text = get_three_day_forecast(lat, lon)
+    # Pull data by coords (all six upstream calls in parallel)
+    hist_date = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
+    current_f = _fetch_executor.submit(get_openweather_current, lat, lon)
+    forecast_f = _fetch_executor.submit(get_openweather_forecast, lat, lon)
+    aqi_f = _fetch_executor.submit(get_air_quality, lat, lon)
+    alerts_f = _fetch_executor.submit(get_weather_alerts, lat, lon)
+    forecast_text_f = _fetch_executor.submit(get_three_day_forecast, lat, lon)
+    history_f = _fetch_executor.submit(get_historical_weather, lat, lon, hist_date)
+
+    current = current_f.result()
+    forecast = forecast_f.result()
+    aqi = aqi_f.result()
+    alerts = alerts_f.result()
+    forecast_text = forecast_text_f.result()
     weatherapi_current = {}
     if isinstance(forecast_text, dict):
         weatherapi_current = forecast_text.get("current") or {}
-    hist_date = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
-    history = get_historical_weather(lat, lon, hist_date)
+    history = history_f.result()
 
     # Pretty location name
     if not display_name:
         try:
-            display_name = reverse_geolocate(lat, lon)
+            display_name = cached_reverse_geolocate(lat, lon)
         except Exception:
             display_name = f"{lat:.3f}, {lon:.3f}"
 
@@ -651,15 +694,16 @@ User prompt context:
             logger.warning("LLM disabled fallback | %s | %s", display_name, tone)
         else:
             try:
-                client = OpenAI(api_key=OPENAI_API_KEY)
+                client = _openai_client()
 
                 # Call OpenAI with logging
                 start_time = time.time()
-                response = client.chat.completions.create(
-                    model=OPENAI_MODEL,
-                    messages=messages,
-                    max_tokens=906
-                )
+                with llm_concurrency:
+                    response = client.chat.completions.create(
+                        model=OPENAI_MODEL,
+                        messages=messages,
+                        max_tokens=906
+                    )
                 duration_ms = (time.time() - start_time) * 1000
                 llm_called = True
 
@@ -801,7 +845,7 @@ def generate_summary_stream(
 
     Yields: str tokens (not SSE-wrapped — the route handles formatting).
     """
-    from geo_utils_helper import reverse_geolocate
+    from geo_utils_helper import cached_reverse_geolocate
 
     current = get_openweather_current(lat, lon)
     forecast = get_openweather_forecast(lat, lon)
@@ -813,7 +857,7 @@ def generate_summary_stream(
 
     if not display_name:
         try:
-            display_name = reverse_geolocate(lat, lon)
+            display_name = cached_reverse_geolocate(lat, lon)
         except Exception:
             display_name = f"{lat:.3f}, {lon:.3f}"
 
@@ -854,13 +898,15 @@ User prompt context:
         messages.extend(conversation_history)
     messages.append({"role": "user", "content": summary_input})
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    stream = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=messages,
-        max_tokens=906,
-        stream=True,
-    )
+    client = _openai_client()
+    # Only opening the stream takes a slot; a slow SSE client mustn't hold one while it drains
+    with llm_concurrency:
+        stream = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            max_tokens=906,
+            stream=True,
+        )
     for chunk in stream:
         token = chunk.choices[0].delta.content
         if token is not None:
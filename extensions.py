@@ -1,4 +1,6 @@
+import orjson
 from flask import request
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
@@ -23,3 +25,45 @@ limiter = Limiter(
     storage_uri="memory://",
     headers_enabled=True,
 )
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for jsonify() and request.get_json().
+
+    Keeps DefaultJSONProvider semantics: sort_keys / compact are honoured,
+    datetimes still go through Flask's default (HTTP date), and anything
+    orjson can't encode falls back to the stdlib path.
+    """
+
+    def _orjson_option(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj) -> bytes | None:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option())
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        if not kwargs:
+            body = self._encode(obj)
+            if body is not None:
+                return body.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._encode(obj)
+        if body is None:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -4,13 +4,40 @@
 # Utility functions for geolocation via OpenCage
 
 import os
+import threading
 import requests
 import math
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 GEOLOCATION_API_KEY = os.getenv("GEOLOCATION_API_KEY")
 WEATHERAPI_KEY = os.getenv("WEATHERAPI_KEY")
 WEATHERAPI_URL = "http://api.weatherapi.com/v1"
 
+# One pooled session for all geocoder traffic: keep-alive connections to OpenCage /
+# WeatherAPI instead of a fresh TCP+TLS handshake per lookup, plus a short retry on
+# throttling and transient 5xx.
+_http = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,  # hand back the last response; callers already check status_code
+    ),
+)
+_http.mount("https://", _http_adapter)
+_http.mount("http://", _http_adapter)
+
+# Reverse geocodes on a ~100 m grid (lat/lon rounded to 3dp); place names don't move.
+_reverse_geo_cache = TTLCache(maxsize=10_000, ttl=86400)
+_reverse_geo_lock = threading.Lock()
+_COORDS_FALLBACK_PREFIX = "Location "
+
 def is_valid_coordinates(lat, lon):
     """Validate that coordinates are reasonable"""
     try:
@@ -37,7 +64,7 @@ def get_geolocation(city_name):
     Given a city name, return (lat, lon, full name)
     """
     url = "https://api.opencagedata.com/geocode/v1/json"
-    resp = requests.get(url, params={"q": city_name, "key": GEOLOCATION_API_KEY}, timeout=5)
+    resp = _http.get(url, params={"q": city_name, "key": GEOLOCATION_API_KEY}, timeout=5)
     if resp.status_code != 200:
         print(f"Geolocation Error: {resp.status_code}: {resp.text}")
         return None, None, None
@@ -71,7 +98,7 @@ def resolve_location_query(query: str) -> dict | None:
         print(f"⚠️ OpenCage manual resolve failed: {e}")
 
     try:
-        resp = requests.get(
+        resp = _http.get(
             f"{WEATHERAPI_URL}/search.json",
             params={"key": WEATHERAPI_KEY, "q": clean_query},
             timeout=5,
@@ -117,7 +144,7 @@ def reverse_geolocate(lat, lon):
     # 1) First, try OpenCage (high-precision reverse geocoding)
     try:
         url = f"https://api.opencagedata.com/geocode/v1/json"
-        resp = requests.get(url, params={
+        resp = _http.get(url, params={
             "q": f"{lat},{lon}",
             "key": GEOLOCATION_API_KEY,
             "limit": 1,
@@ -143,7 +170,7 @@ def reverse_geolocate(lat, lon):
     # 2) Fallback to WeatherAPI with validation
     try:
         wa_url = f"{WEATHERAPI_URL}/search.json"
-        resp = requests.get(wa_url, params={
+        resp = _http.get(wa_url, params={
             "key": WEATHERAPI_KEY, 
             "q": f"{lat},{lon}"
         }, timeout=5)
@@ -167,7 +194,28 @@ def reverse_geolocate(lat, lon):
 
     # 3) Last resort: Return coordinates as string
     print(f"⚠️ All reverse geocoding failed for {lat}, {lon}")
-    return f"Location {lat:.2f}, {lon:.2f}"
+    return f"{_COORDS_FALLBACK_PREFIX}{original_lat:.2f}, {original_lon:.2f}"
+
+def cached_reverse_geolocate(lat, lon):
+    """
+    reverse_geolocate() behind a process-local TTL cache.
+    Only real place names are cached; invalid input and the coordinate-string
+    fallback always go through so a provider outage isn't remembered.
+    """
+    if not is_valid_coordinates(lat, lon):
+        return reverse_geolocate(lat, lon)
+
+    key = (round(float(lat), 3), round(float(lon), 3))
+    with _reverse_geo_lock:
+        name = _reverse_geo_cache.get(key)
+    if name is not None:
+        return name
+
+    name = reverse_geolocate(lat, lon)
+    if name and not name.startswith(_COORDS_FALLBACK_PREFIX):
+        with _reverse_geo_lock:
+            _reverse_geo_cache[key] = name
+    return name
 
 def resolve_city_from_latlon(lat, lon):
     """Legacy function - now uses the improved reverse_geolocate"""
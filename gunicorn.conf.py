@@ -0,0 +1,17 @@
+"""Gunicorn settings for the web dyno (see Procfile).
+
+Requests spend nearly all their time waiting on OpenAI and weather APIs, so
+each worker runs a gthread pool; threads release the GIL while blocked on I/O.
+Every value can still be overridden from the environment.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# Kept at the old Procfile default. Each worker holds its own caches, LLM
+# semaphore and (with START_WEATHER_MONITOR=true) monitor thread, and
+# os.cpu_count() reports host cores inside containers; scale via WEB_CONCURRENCY.
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
@@ -1,8 +1,15 @@
 # improved_location_resolver.py (FIXED VERSION)
 # Fixes: Explicit city mentions now ALWAYS override geolocation
 
+import threading
 from typing import Dict, Optional, Tuple
-from geo_utils_helper import reverse_geolocate, calculate_distance, is_valid_coordinates, get_geolocation
+from cachetools import TTLCache
+from geo_utils_helper import cached_reverse_geolocate, calculate_distance, is_valid_coordinates, get_geolocation
+
+# Resolved locations keyed by (city, lat/lon rounded to 3dp ≈ 100 m, frontend name).
+# Repeat requests skip the forward/reverse geocoding round trips entirely.
+_resolved_location_cache = TTLCache(maxsize=8192, ttl=3600)
+_resolved_location_lock = threading.Lock()
 
 # # OLD VERSION (disabled 2025-11-13 by Josh to fix Rouville/Lyon bug)
 # def resolve_location_safely(...):
@@ -10,10 +17,45 @@ from geo_utils_helper import reverse_geolocate, calculate_distance, is_valid_coo
 #     # old logic
 #     ...
 
+def _resolved_location_key(resolved_city: Optional[str], location: Optional[Dict]) -> tuple:
+    lat = lon = name = None
+    if location:
+        try:
+            lat = round(float(location.get("lat")), 3)
+            lon = round(float(location.get("lon")), 3)
+        except (TypeError, ValueError):
+            lat = lon = None
+        name = location.get("name")
+    return ((resolved_city or "").strip().lower(), lat, lon, name)
+
+
 def resolve_location_safely(
     user_prompt: str,
     resolved_city: Optional[str],
     location: Optional[Dict]
+) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """
+    Cached front for _resolve_location_uncached. Failed resolutions are not cached
+    so a transient geocoder error doesn't stick.
+    """
+    key = _resolved_location_key(resolved_city, location)
+    with _resolved_location_lock:
+        cached = _resolved_location_cache.get(key)
+    if cached is not None:
+        print(f"🧭 resolve_location_safely() cache hit: {cached[2]!r}")
+        return cached
+
+    resolved = _resolve_location_uncached(user_prompt, resolved_city, location)
+    if resolved[0] is not None and resolved[1] is not None:
+        with _resolved_location_lock:
+            _resolved_location_cache[key] = resolved
+    return resolved
+
+
+def _resolve_location_uncached(
+    user_prompt: str,
+    resolved_city: Optional[str],
+    location: Optional[Dict]
 ) -> Tuple[Optional[float], Optional[float], Optional[str]]:
     """
     Safely resolve location with strict validation to prevent wrong coordinates.
@@ -54,7 +96,7 @@ def resolve_location_safely(
             # Try to re-use friendly name if frontend provided it (from /geo/reverse)
             display_name = location.get("name")
             if not display_name:
-                display_name = reverse_geolocate(lat, lon)
+                display_name = cached_reverse_geolocate(lat, lon)
 
             print(f"   ✅ Using frontend coordinates: ({lat}, {lon}) → {display_name!r}")
             return lat, lon, display_name
@@ -3,6 +3,7 @@ import hashlib
 import logging
 import os
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime, timezone
 
@@ -26,6 +27,11 @@ def _env_int(name, default):
 LLM_QUOTA_DB_PATH = os.getenv("LLM_QUOTA_DB_PATH", "llm_quota.db")
 LLM_DAILY_LIMIT_PER_IP = _env_int("LLM_DAILY_LIMIT_PER_IP", 20)
 LLM_BURST_LIMIT_PER_MINUTE = _env_int("LLM_BURST_LIMIT_PER_MINUTE", 5)
+LLM_MAX_CONCURRENCY = _env_int("LLM_MAX_CONCURRENCY", 10)
+
+# Caps in-flight OpenAI requests per worker process so bursts queue here instead
+# of tripping provider 429s and paying the SDK's retry backoff.
+llm_concurrency = threading.BoundedSemaphore(max(1, LLM_MAX_CONCURRENCY))
 
 logger = logging.getLogger("mister_donkey.llm_quota")
 _quota_db_initialized = False
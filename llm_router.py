@@ -5,9 +5,10 @@
 import json
 import os
 from openai import OpenAI
-from config import OPENAI_API_KEY, OPENAI_MODEL
+from config import OPENAI_API_KEY, OPENAI_MAX_RETRIES, OPENAI_MODEL, OPENAI_TIMEOUT
+from llm_quota import llm_concurrency
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
 
 def route_request(user_prompt: str) -> dict:
     """
@@ -64,16 +65,17 @@ def route_request(user_prompt: str) -> dict:
     ]
 
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL, 
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": user_prompt}
-            ],
-            tools=tools,
-            tool_choice={"type": "function", "function": {"name": "route_weather_request"}},
-            temperature=0.0
-        )
+        with llm_concurrency:
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL, 
+                messages=[
+                    {"role": "system", "content": system_instruction},
+                    {"role": "user", "content": user_prompt}
+                ],
+                tools=tools,
+                tool_choice={"type": "function", "function": {"name": "route_weather_request"}},
+                temperature=0.0
+            )
 
         tool_call = response.choices[0].message.tool_calls[0]
         arguments = json.loads(tool_call.function.arguments)
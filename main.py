@@ -6,6 +6,7 @@ import time
 import json
 import uuid
 import traceback
+import orjson
 import requests as http
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
@@ -62,7 +63,7 @@ from threading import Thread
 from weather_agent import monitor_all_sessions_loop
 from weather_agent import weather_agent_bp
 from conversation_manager import conversation_manager
-from extensions import limiter
+from extensions import ORJSONProvider, limiter
 from conversation_db import init_db as _init_conversation_db
 from request_metrics import (
     get_metrics_summary,
@@ -75,6 +76,11 @@ from llm_cache import init_cache_db as _init_llm_cache_db
 from llm_quota import init_quota_db as _init_llm_quota_db
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# No key sorting / pretty-printing on responses (Flask 3 dropped the JSON_SORT_KEYS /
+# JSONIFY_PRETTYPRINT_REGULAR config keys; these provider attributes replace them)
+app.json.sort_keys = False
+app.json.compact = True
 limiter.init_app(app)
 _init_conversation_db()
 try:
@@ -130,7 +136,14 @@ _SILENT_PATHS = {"/health", "/health/deep"}
 def _get_request_json():
     if not request.is_json:
         return {}
-    data = request.get_json(silent=True)
+    # orjson parse; cache=True keeps the raw body for request.get_json() in the routes
+    raw = request.get_data(cache=True)
+    if not raw:
+        return {}
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return {}
     return data if isinstance(data, dict) else {}
 
 
@@ -190,7 +203,7 @@ def log_request():
     print(f"{rid} Path: {request.path}")
     print(f"{rid} Origin: {request.headers.get('Origin', 'No origin')}")
     if ENV == "dev" and g.request_json:
-        print(f"{rid} Body: {json.dumps(g.request_json, indent=2)}")
+        print(f"{rid} Body: {orjson.dumps(g.request_json, option=orjson.OPT_INDENT_2).decode()}")
 
 @app.after_request
 def log_response(response):
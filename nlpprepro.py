@@ -6,8 +6,9 @@ import os
 import json
 from openai import OpenAI
 
-from config import OPENAI_API_KEY, OPENAI_MODEL  # ← Added OPENAI_MODEL
-client = OpenAI(api_key=OPENAI_API_KEY)
+from config import OPENAI_API_KEY, OPENAI_MAX_RETRIES, OPENAI_MODEL, OPENAI_TIMEOUT  # ← Added OPENAI_MODEL
+from llm_quota import llm_concurrency
+client = OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
 
 def preprocess_with_gpt(prompt_text: str) -> dict:
     """
@@ -25,15 +26,16 @@ def preprocess_with_gpt(prompt_text: str) -> dict:
     )
 
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,  # ← FIXED: Now uses env variable instead of hardcoded
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": prompt_text}
-            ],
-            temperature=0.2,
-            max_tokens=150
-        )
+        with llm_concurrency:
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,  # ← FIXED: Now uses env variable instead of hardcoded
+                messages=[
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": prompt_text}
+                ],
+                temperature=0.2,
+                max_tokens=150
+            )
         reply = response.choices[0].message.content
         return json.loads(reply)
     except Exception as e:
@@ -2,54 +2,100 @@
 # Fixes: Supports tone selection and conversation history
 # NEW: Uses LLM router for intelligent location resolution
 
-import re
-from dopplertower_engine import get_full_weather_summary, get_full_weather_summary_by_coords
-from geo_utils_helper import get_geolocation, reverse_geolocate
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dopplertower_engine import get_full_weather_summary_by_coords
 from nlpprepro import preprocess_with_gpt
 from agent_dkmanager import check_and_create_agent
-from city_resolver import resolve_city_context, preprocess_prompt_for_weather
 from llm_router import preprocess_prompt_for_weather_with_llm  # NEW: LLM-based router
 from improved_location_resolver import resolve_location_safely, validate_weather_result
 
+logger = logging.getLogger("mister_donkey.prompt")
+
+# The GPT parse runs here so it overlaps the geocoding done on the request thread.
+_side_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prompt-side")
+
+# Only the most recent turns are forwarded to the LLM (default: 6 user/assistant pairs).
+# routes._conversation_history loads exactly this many, so nothing loaded is trimmed away.
+MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "12"))
+
+
+def _trim_history(conversation_history: list | None) -> list | None:
+    """Bound the history forwarded to the LLM so prompt size doesn't grow with the conversation."""
+    if not conversation_history:
+        return conversation_history
+    return conversation_history[-MAX_HISTORY_MESSAGES:]
+
+@lru_cache(maxsize=1024)
 def normalize_city_name(city: str) -> str:
-    return " ".join(w.capitalize() for w in city.strip().split())
+    city = city.strip()
+    # Single-spaced alphabetic words: title() gives the same result in one C call.
+    # Anything with hyphens/apostrophes/extra spaces keeps the per-word path
+    # ("o'fallon" → "O'fallon", not title()'s "O'Fallon").
+    if city.replace(" ", "").isalpha() and "  " not in city:
+        return city.title()
+    return " ".join(w.capitalize() for w in city.split())
 
-def process_prompt_from_app(
-    prompt_text: str, 
-    location: dict | None = None,
-    tone: str = "sarcastic",  # NEW
-    conversation_history: list = None  # NEW
-) -> dict:
+class LocationUnresolved(Exception):
+    """Raised by _resolve_pipeline when neither the prompt nor the frontend yields coordinates."""
+
+    def __init__(self, debug_info: dict):
+        super().__init__("Could not determine location.")
+        self.debug_info = debug_info
+
+    def to_response(self) -> dict:
+        return {
+            "error": "Could not determine location. Please provide a city name or enable location services.",
+            "debug_info": self.debug_info
+        }
+
+
+def _resolve_pipeline(
+    prompt_text: str,
+    location: dict | None,
+    tone: str,
+    conversation_history: list | None,
+    label: str = "",
+    parse_prompt: bool = False
+) -> tuple:
     """
-    Enhanced prompt processor with tone selection and conversation continuity.
-    
-    NEW Parameters:
-    - tone: Personality tone for the response (sarcastic, pirate, professional, etc.)
-    - conversation_history: Previous messages in the conversation
+    Shared STEP 0-2 of the prompt pipeline: LLM routing, GPT parsing, location resolution.
+
+    The GPT parse (an OpenAI call) only runs for callers that use it (parse_prompt=True);
+    otherwise parsed is None.
+
+    Returns (parsed, final_lat, final_lon, display_name, resolver_result).
+    Raises LocationUnresolved when no usable coordinates were found.
     """
-    print(f"🚀 Processing prompt: '{prompt_text}'")
-    print(f"📍 Location data: {location}")
-    print(f"🎭 Tone: {tone}")
+    logger.debug("🚀 Processing %sprompt: %r", label, prompt_text)
+    logger.debug("📍 Location data: %s", location)
+    logger.debug("🎭 Tone: %s", tone)
     if conversation_history:
-        print(f"💬 Conversation history: {len(conversation_history)} messages")
+        logger.debug("💬 Conversation history: %d messages", len(conversation_history))
 
     # STEP 0: LLM Router Preprocessing (NEW: Uses intelligent semantic routing)
     resolver_result = preprocess_prompt_for_weather_with_llm(prompt_text, location)
-    
+
     processed_prompt = resolver_result["processed_prompt"]
     resolved_city_from_resolver = resolver_result["resolved_city"]
     resolver_metadata = resolver_result["metadata"]
-    
-    print(f"🎯 LLM Router Results:")
-    print(f"   Original: '{resolver_result['original_prompt']}'")
-    print(f"   Processed: '{processed_prompt}'")
-    print(f"   Resolved City: {resolved_city_from_resolver}")
-    print(f"   Method: {resolver_metadata.get('resolution_method')}")
-    print(f"   Is Explicit: {resolver_metadata.get('is_location_explicit')}")
-    
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "🎯 LLM Router Results: original=%r processed=%r city=%s method=%s explicit=%s",
+            resolver_result["original_prompt"],
+            processed_prompt,
+            resolved_city_from_resolver,
+            resolver_metadata.get("resolution_method"),
+            resolver_metadata.get("is_location_explicit"),
+        )
+
+    # STEP 1 + 2 only depend on the router output, so when requested the GPT parse
+    # runs in the background while location resolution (geocoding) runs here.
     # STEP 1: NLP Preprocessing with GPT
-    parsed = preprocess_with_gpt(processed_prompt)
-    print("🤖 GPT preprocessor returned:", parsed)
+    parsed_future = _side_executor.submit(preprocess_with_gpt, processed_prompt) if parse_prompt else None
 
     # STEP 2: Safely resolve location (explicit cities always take priority over geolocation)
     final_lat, final_lon, display_name = resolve_location_safely(
@@ -57,20 +103,51 @@ def process_prompt_from_app(
         resolved_city=resolved_city_from_resolver,
         location=location
     )
-    
-    # If we couldn't resolve location, return error
+
+    parsed = parsed_future.result() if parsed_future else None
+    if parsed_future:
+        logger.debug("🤖 GPT preprocessor returned: %s", parsed)
+
     if final_lat is None or final_lon is None:
-        return {
-            "error": "Could not determine location. Please provide a city name or enable location services.",
-            "debug_info": {
-                "resolver_result": resolver_result,
-                "gpt_parsed": parsed,
-                "location_input": location
-            }
-        }
-    
-    print(f"🌍 Final resolved location: {display_name} at {final_lat}, {final_lon}")
+        raise LocationUnresolved({
+            "resolver_result": resolver_result,
+            # The debug payload still reports the parse; on this path only, parse on demand
+            "gpt_parsed": parsed if parsed_future else preprocess_with_gpt(processed_prompt),
+            "location_input": location
+        })
+
+    # Plain floats so the response stays serializable by orjson (no numpy.float64)
+    final_lat, final_lon = float(final_lat), float(final_lon)
+
+    logger.debug("🌍 Final resolved location: %s at %s, %s", display_name, final_lat, final_lon)
+    return parsed, final_lat, final_lon, display_name, resolver_result
+
+
+def process_prompt_from_app(
+    prompt_text: str, 
+    location: dict | None = None,
+    tone: str = "sarcastic",  # NEW
+    conversation_history: list = None  # NEW
+) -> dict:
+    """
+    Enhanced prompt processor with tone selection and conversation continuity.
     
+    NEW Parameters:
+    - tone: Personality tone for the response (sarcastic, pirate, professional, etc.)
+    - conversation_history: Previous messages in the conversation
+    """
+    conversation_history = _trim_history(conversation_history)
+
+    try:
+        parsed, final_lat, final_lon, display_name, resolver_result = _resolve_pipeline(
+            prompt_text, location, tone, conversation_history, parse_prompt=True
+        )
+    except LocationUnresolved as ex:
+        return ex.to_response()
+
+    processed_prompt = resolver_result["processed_prompt"]
+    resolved_city_from_resolver = resolver_result["resolved_city"]
+
     # STEP 3: Get weather using coordinates with tone and conversation history
     result = get_full_weather_summary_by_coords(
         final_lat, 
@@ -83,8 +160,9 @@ def process_prompt_from_app(
     )
     
     # STEP 4: Validate result matches expected location
-    if not validate_weather_result(result, final_lat, final_lon):
-        print("🚨 Weather result validation FAILED - coordinates don't match!")
+    validation_passed = validate_weather_result(result, final_lat, final_lon)
+    if not validation_passed:
+        logger.warning("🚨 Weather result validation FAILED - coordinates don't match!")
         result["warning"] = "Location validation failed. Result may be inaccurate."
     
     # Add debugging information
@@ -102,7 +180,7 @@ def process_prompt_from_app(
         "final_coords": {"lat": final_lat, "lon": final_lon},
         "display_name": display_name,
         "llm_router": resolver_result,  # Changed from city_resolver to llm_router
-        "validation_passed": validate_weather_result(result, final_lat, final_lon),
+        "validation_passed": validation_passed,
         "location_source": "explicit_city" if resolved_city_from_resolver else "user_location",
         "tone": tone,
         "has_conversation_history": conversation_history is not None
@@ -111,7 +189,7 @@ def process_prompt_from_app(
     # Agent creation (existing logic)
     agent_msg = check_and_create_agent(parsed, location, user_id="anon123")
     if agent_msg:
-        print(agent_msg)
+        logger.info("%s", agent_msg)
 
     return result
 
@@ -156,56 +234,21 @@ def get_full_weather_summary_by_coords_structured(
     Full processing pipeline that returns structured response.
     Combines LLM routing, location resolution, and structured formatting.
     """
-    print(f"🚀 Processing structured prompt: '{prompt_text}'")
-    print(f"📍 Location data: {location}")
-    print(f"🎭 Tone: {tone}")
-    if conversation_history:
-        print(f"💬 Conversation history: {len(conversation_history)} messages")
+    conversation_history = _trim_history(conversation_history)
 
-    # STEP 0: LLM Router Preprocessing
-    resolver_result = preprocess_prompt_for_weather_with_llm(prompt_text, location)
-
-    processed_prompt = resolver_result["processed_prompt"]
-    resolved_city_from_resolver = resolver_result["resolved_city"]
-    resolver_metadata = resolver_result["metadata"]
-
-    print(f"🎯 LLM Router Results (Structured):")
-    print(f"   Original: '{resolver_result['original_prompt']}'")
-    print(f"   Processed: '{processed_prompt}'")
-    print(f"   Resolved City: {resolved_city_from_resolver}")
-    print(f"   Method: {resolver_metadata.get('resolution_method')}")
-    print(f"   Is Explicit: {resolver_metadata.get('is_location_explicit')}")
-
-    # STEP 1: NLP Preprocessing with GPT
-    parsed = preprocess_with_gpt(processed_prompt)
-    print("🤖 GPT preprocessor returned:", parsed)
-
-    # STEP 2: Safely resolve location
-    final_lat, final_lon, display_name = resolve_location_safely(
-        user_prompt=prompt_text,
-        resolved_city=resolved_city_from_resolver,
-        location=location
-    )
-
-    # If we couldn't resolve location, return error
-    if final_lat is None or final_lon is None:
-        return {
-            "error": "Could not determine location. Please provide a city name or enable location services.",
-            "debug_info": {
-                "resolver_result": resolver_result,
-                "gpt_parsed": parsed,
-                "location_input": location
-            }
-        }
-
-    print(f"🌍 Final resolved location: {display_name} at {final_lat}, {final_lon}")
+    try:
+        _parsed, final_lat, final_lon, display_name, resolver_result = _resolve_pipeline(
+            prompt_text, location, tone, conversation_history, label="structured "
+        )
+    except LocationUnresolved as ex:
+        return ex.to_response()
 
     # STEP 3: Get weather using coordinates with STRUCTURED=True
     result = get_full_weather_summary_by_coords(
         final_lat,
         final_lon,
         display_name=display_name,
-        user_prompt=processed_prompt,
+        user_prompt=resolver_result["processed_prompt"],
         timezone_offset=0,
         tone=tone,
         conversation_history=conversation_history,
@@ -214,7 +257,7 @@ def get_full_weather_summary_by_coords_structured(
 
     # STEP 4: Validate result matches expected location
     if not validate_weather_result(result.get("raw", {}), final_lat, final_lon):
-        print("🚨 Weather result validation FAILED - coordinates don't match!")
+        logger.warning("🚨 Weather result validation FAILED - coordinates don't match!")
         result["metadata"]["validation_warning"] = "Location validation failed. Result may be inaccurate."
 
-    return result
\ No newline at end of file
+    return result
@@ -1,16 +1,27 @@
 # push_helper.py
 # Push notification + email helper functions
 
-import smtplib
 import os
 import json
-import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from cachetools import TTLCache
+from email.message import EmailMessage
 from typing import Optional
 
+FCM_BATCH_LIMIT = 500  # messaging.send_each accepts at most 500 messages per call
+
+# Device tokens are looked up repeatedly for the same user (retries, scheduled
+# checks, batch fan-outs), so keep them for a few minutes per worker. Only hits
+# are cached: a device that registers right after a miss must be seen at once.
+# Nothing in this app writes tokens yet (_lookup_device_token is a stub), so the
+# cache stays empty; whatever stores/rotates tokens must pop the user's entry here.
+_device_token_cache = TTLCache(maxsize=10_000, ttl=300)
+_device_token_lock = threading.Lock()
+
 # ─── Placeholder Stub ─────────────────────────────────────────────────────────
-def get_user_device_token(user_id: str) -> Optional[str]:
+def _lookup_device_token(user_id: str) -> Optional[str]:
     """
     Placeholder: Return a user's device token for push notifications.
     You should replace this with actual DB lookup logic.
@@ -18,6 +29,19 @@ def get_user_device_token(user_id: str) -> Optional[str]:
     # TODO: implement retrieving device token (FCM token) for this user from your DB
     return None
 
+def get_user_device_token(user_id: str) -> Optional[str]:
+    """_lookup_device_token() behind the per-worker TTL cache (misses are not cached)."""
+    with _device_token_lock:
+        token = _device_token_cache.get(user_id)
+    if token is not None:
+        return token
+
+    token = _lookup_device_token(user_id)
+    if token:
+        with _device_token_lock:
+            _device_token_cache[user_id] = token
+    return token
+
 def send_push_placeholder(user_id: str, title: str, message: str, data: dict = None) -> bool:
     """
     Placeholder method for sending push notifications to a user.
@@ -32,25 +56,41 @@ def send_push_placeholder(user_id: str, title: str, message: str, data: dict = N
         return False
 
 # ── Firebase Admin (FCM) Implementation ─────────────────────────────
-import firebase_admin
-from firebase_admin import credentials, messaging
+# firebase_admin pulls in gRPC/protobuf/google-auth, so it is only imported
+# the first time a push is actually sent.
+@lru_cache(maxsize=1)
+def _init_firebase():
+    """Import and initialize Firebase Admin once; returns the messaging module."""
+    import firebase_admin
+    from firebase_admin import credentials, messaging
+
+    firebase_admin_json = os.getenv("FIREBASE_ADMIN_JSON")  # ← this should already be in your Render vars
 
-firebase_admin_json = os.getenv("FIREBASE_ADMIN_JSON")  # ← this should already be in your Render vars
+    if not firebase_admin_json:
+        raise RuntimeError("❌ FIREBASE_ADMIN_JSON environment variable not set")
 
-if not firebase_admin_json:
-    raise RuntimeError("❌ FIREBASE_ADMIN_JSON environment variable not set")
+    try:
+        cred_dict = json.loads(firebase_admin_json)
+        cred = credentials.Certificate(cred_dict)
 
-try:
-    cred_dict = json.loads(firebase_admin_json)
-    cred = credentials.Certificate(cred_dict)
+        # Only initialize if not already done (prevent duplicate init error)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred)
+    except Exception as e:
+        raise RuntimeError(f"🔥 Failed to initialize Firebase Admin SDK: {e}")
 
-    # Only initialize if not already done (prevent duplicate init error)
-    if not firebase_admin._apps:
-        firebase_admin.initialize_app(cred)
-except Exception as e:
-    raise RuntimeError(f"🔥 Failed to initialize Firebase Admin SDK: {e}")
+    return messaging
 
 # ─── Email‐sending Helper ──────────────────────────────────────────────────────
+def _build_alert_msg(from_email: str, to_email: str, subject: str, content: str) -> bytes:
+    """Render a plain-text alert email; single-part EmailMessage avoids the multipart/boundary work."""
+    msg = EmailMessage()
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.set_content(content, cte="quoted-printable")  # 7-bit safe for servers without 8BITMIME
+    return msg.as_bytes()
+
 def send_email_alert(to_email: str, subject: str, body: str, location: Optional[str] = None) -> bool:
     """
     Simple SMTP email alert. Replace with your own SMTP credentials or service.
@@ -66,20 +106,16 @@ def send_email_alert(to_email: str, subject: str, body: str, location: Optional[
         return False
 
     try:
-        msg = MIMEMultipart()
-        msg["From"] = from_email
-        msg["To"] = to_email
-        msg["Subject"] = subject
+        import smtplib
 
         content = body
         if location:
             content = f"Location: {location}\n\n{body}"
-        msg.attach(MIMEText(content, "plain"))
 
         server = smtplib.SMTP(smtp_host, smtp_port)
         server.starttls()
         server.login(smtp_user, smtp_pass)
-        server.sendmail(from_email, to_email, msg.as_string())
+        server.sendmail(from_email, to_email, _build_alert_msg(from_email, to_email, subject, content))
         server.quit()
         return True
 
@@ -89,18 +125,68 @@ def send_email_alert(to_email: str, subject: str, body: str, location: Optional[
 
 def send_push_firebase(title, body, token):
     """Send FCM push notification to the specified device."""
-    message = messaging.Message(
-        notification=messaging.Notification(
-            title=title,
-            body=body,
-        ),
-        token=token,
-    )
-
     try:
+        messaging = _init_firebase()
+        message = messaging.Message(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            token=token,
+        )
         response = messaging.send(message)
         print(f"✅ FCM push sent! Response: {response}")
         return response
     except Exception as e:
         print(f"❌ Failed to send push notification: {e}")
         return None
+
+def send_push_batch(notifications: list[tuple[str, str, str]], data: dict = None) -> int:
+    """
+    Send one FCM notification per (user_id, title, body) in batched send_each calls,
+    e.g. every alert produced by one weather-agent tick.
+    Returns the number of messages FCM accepted.
+    """
+    if not notifications:
+        return 0
+
+    # Token lookups are I/O-bound DB calls, so resolve them concurrently
+    user_ids = list({user_id for user_id, _, _ in notifications})
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        token_by_user = dict(zip(user_ids, pool.map(get_user_device_token, user_ids)))
+
+    addressed = [
+        (token_by_user[user_id], title, body)
+        for user_id, title, body in notifications
+        if token_by_user[user_id]
+    ]
+    if not addressed:
+        return 0
+
+    try:
+        messaging = _init_firebase()
+    except Exception as e:
+        print(f"❌ Failed to send batch push notification: {e}")
+        return 0
+
+    # FCM data payloads must be str → str
+    payload = {str(k): str(v) for k, v in data.items()} if data else None
+    success_count = 0
+
+    for start in range(0, len(addressed), FCM_BATCH_LIMIT):
+        messages = [
+            messaging.Message(
+                notification=messaging.Notification(title=title, body=body),
+                data=payload,
+                token=token,
+            )
+            for token, title, body in addressed[start:start + FCM_BATCH_LIMIT]
+        ]
+        try:
+            response = messaging.send_each(messages)
+            success_count += response.success_count
+        except Exception as e:
+            print(f"❌ Failed to send batch push notification: {e}")
+
+    print(f"✅ FCM batch push sent: {success_count}/{len(addressed)} delivered")
+    return success_count
@@ -1,5 +1,7 @@
 import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 
@@ -14,6 +16,24 @@ except Exception:  # pragma: no cover - keeps module importable outside Flask
 
 REQUEST_METRICS_DB_PATH = os.getenv("REQUEST_METRICS_DB_PATH", "request_metrics.db")
 
+# Request metrics are written by a background thread in batches so the
+# after_request hook never waits on SQLite. The queue is bounded; if the
+# writer falls behind, new rows are dropped (metrics are best effort).
+_REQUEST_METRIC_BATCH_SIZE = 200
+_request_metric_queue = queue.Queue(maxsize=10_000)
+_request_metric_writer = None
+_request_metric_writer_lock = threading.Lock()
+
+_INSERT_REQUEST_METRIC = """
+    INSERT INTO request_metrics (
+      timestamp, method, path, status, duration_ms, session_id, location, request_id, error
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _is_debug_env():
+    return os.getenv("ENV", "prod").strip().lower() in ("dev", "development", "local", "test")
+
 
 @contextmanager
 def _connect():
@@ -76,19 +96,54 @@ def init_metrics_db():
         )
 
 
+def _drain_request_metrics():
+    while True:
+        batch = [_request_metric_queue.get()]
+        while len(batch) < _REQUEST_METRIC_BATCH_SIZE:
+            try:
+                batch.append(_request_metric_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with _connect() as conn:
+                conn.executemany(_INSERT_REQUEST_METRIC, batch)
+        except Exception as exc:
+            if _is_debug_env():
+                print(f"Request metrics batch write failed ({len(batch)} rows): {exc}")
+        finally:
+            for _ in batch:
+                _request_metric_queue.task_done()
+
+
+def _ensure_request_metric_writer():
+    global _request_metric_writer
+    if _request_metric_writer is not None and _request_metric_writer.is_alive():
+        return
+    with _request_metric_writer_lock:
+        # Started lazily so each forked gunicorn worker gets its own writer
+        if _request_metric_writer is None or not _request_metric_writer.is_alive():
+            _request_metric_writer = threading.Thread(
+                target=_drain_request_metrics, name="request-metrics-writer", daemon=True
+            )
+            _request_metric_writer.start()
+
+
+def flush_request_metrics():
+    """Block until every queued request metric has been written."""
+    _request_metric_queue.join()
+
+
 def record_request_metric(method, path, status, duration_ms, session_id=None, location=None, request_id=None):
     error = 1 if int(status) >= 500 else 0
     timestamp = datetime.now(timezone.utc).isoformat()
+    row = (timestamp, method, path, int(status), float(duration_ms), session_id, location, request_id, error)
 
-    with _connect() as conn:
-        conn.execute(
-            """
-            INSERT INTO request_metrics (
-              timestamp, method, path, status, duration_ms, session_id, location, request_id, error
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (timestamp, method, path, int(status), float(duration_ms), session_id, location, request_id, error),
-        )
+    _ensure_request_metric_writer()
+    try:
+        _request_metric_queue.put_nowait(row)
+    except queue.Full:
+        if _is_debug_env():
+            print("Request metrics queue full; dropping metric")
 
 
 def _request_payload():
@@ -169,7 +224,7 @@ def record_event_metric(
                 ),
             )
     except Exception as exc:
-        if os.getenv("ENV", "prod").strip().lower() in ("dev", "development", "local", "test"):
+        if _is_debug_env():
             print(f"Event metrics recording failed: {exc}")
 
 
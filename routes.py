@@ -1,16 +1,25 @@
 # routes.py (UPDATED VERSION)
 # Fixes: Added tone selector and conversation history support
 
-import json
+import hashlib
+import logging
 import os
+import re
+import threading
 import traceback
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import orjson
+from cachetools import TTLCache
 
 from flask import Blueprint, Response, g, jsonify, redirect, request, stream_with_context, url_for
 from flask_cors import cross_origin
 
 from extensions import limiter
-from utils import ErrorCode, error_response
+from utils import ErrorCode, dumps_json, error_response, ojsonify, request_body
 from conversation_db import get_history_for_openai, get_history_raw, store_exchange
 from request_metrics import record_event_metric
 
@@ -26,17 +35,35 @@ PROMPT_RATE_LIMIT = (
 
 prompt_rate_limit = limiter.shared_limit(PROMPT_RATE_LIMIT, scope="prompt")
 
+# Short-lived /prompt result cache. Auto-load fires the same prompt for the same
+# device on every app open; within 5 minutes the weather and the roast are the same.
+_prompt_result_cache = TTLCache(maxsize=2048, ttl=300)
+_prompt_result_lock = threading.Lock()
+
+# Serialized GET /agents body for the current agents_version() ETag (one entry)
+_agents_body_cache = {}
+_agents_body_lock = threading.Lock()
+
+_REQUIRED_AGENT_FIELDS = ("user_id", "city", "times", "timezone")
+_REQUIRED_AGENT_FIELD_SET = frozenset(_REQUIRED_AGENT_FIELDS)
+
+# Agent reminder times: zero-padded 24h "HH:MM" (same shape as agents.json)
+_HHMM_RE = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+
 # Helper for geocoding
-from geo_utils_helper import resolve_location_query, reverse_geolocate
+from geo_utils_helper import cached_reverse_geolocate, resolve_location_query
 
 # Main logic to process the weather prompt
-from process_app_prompt import process_prompt_from_app_structured
+from process_app_prompt import MAX_HISTORY_MESSAGES, process_prompt_from_app_structured
+from dopplertower_engine import TONE_PRESETS
+_VALID_TONES = frozenset(TONE_PRESETS)
+from vitamin_d_forecast import get_vitamin_d_forecast
 
 # Legacy "agent" database functions
-from agent_db import add_agent, get_agents
+from agent_db import add_agent, agents_version, get_agents
 
 # Our custom city resolver
-from city_resolver import resolve_city_context
+from city_resolver import cached_resolve_city_context, coords_only_context
 
 # NEW: Conversation manager
 from conversation_manager import (
@@ -53,6 +80,8 @@ from session_logger import session_logger
 # Create a Blueprint
 bp = Blueprint("routes", __name__)
 
+logger = logging.getLogger("mister_donkey.routes")
+
 
 def _location_label_from_request_data(data):
     location = data.get("location") if isinstance(data.get("location"), dict) else {}
@@ -92,6 +121,62 @@ def _temperature_unit_instruction(temp_unit):
 def _append_temperature_unit_instruction(prompt, temp_unit):
     return f"{prompt}\n\nUser temperature unit preference: {_temperature_unit_instruction(temp_unit)}"
 
+@lru_cache(maxsize=1024)
+def _city_pattern(city_folded):
+    # Lookarounds rather than \b so names ending in punctuation ("Washington D.C.") still match
+    return re.compile(rf"(?<!\w){re.escape(city_folded)}(?!\w)")
+
+def _city_in(prompt_folded, city):
+    """Whole-word check that city already appears in the case-folded prompt."""
+    return _city_pattern(city.casefold()).search(prompt_folded) is not None
+
+def _dev_trace():
+    """Traceback of the exception being handled, formatted only when it will be shown (dev)."""
+    return traceback.format_exc() if ENV == "dev" else None
+
+def _exception_response(ex, code, message=None, **extra):
+    """error_response() for a caught exception: adds error_type, and the trace in dev."""
+    return error_response(
+        message or str(ex), code, 500,
+        error_type=type(ex).__name__,
+        trace=_dev_trace(),
+        **extra,
+    )
+
+def _prompt_cache_key(prompt, location, tone):
+    try:
+        coords = f"{round(float(location.get('lat')), 2)}|{round(float(location.get('lon')), 2)}"
+    except (TypeError, ValueError):
+        coords = "-"
+    raw = f"{prompt}|{coords}|{location.get('name') or ''}|{tone}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+# metadata fields that describe one caller (their quota, their cache key inputs)
+_PER_CALLER_METADATA = ("quota_details", "cache_key_parts")
+
+def _store_prompt_result(cache_key, result):
+    """Share a /prompt result with later callers only when it is the real thing.
+
+    Fallbacks (quota_exceeded is a per-IP decision; llm_error, cache_error and
+    quota-unavailable are transient) would otherwise be replayed to everyone
+    sending the same prompt for the whole TTL.
+    """
+    metadata = result.get("metadata")
+    if result.get("error") or not isinstance(metadata, dict) or metadata.get("fallback_used"):
+        return
+    entry = _response_copy(result)
+    for field in _PER_CALLER_METADATA:
+        entry["metadata"].pop(field, None)
+    with _prompt_result_lock:
+        _prompt_result_cache[cache_key] = entry
+
+def _response_copy(result):
+    """Copy deep enough that per-request decoration never leaks into the cached entry."""
+    copy = dict(result)
+    if isinstance(copy.get("metadata"), dict):
+        copy["metadata"] = dict(copy["metadata"])
+    return copy
+
 def _attach_temp_unit_metadata(result, temp_unit):
     result["temp_unit"] = temp_unit
     metadata = result.get("metadata")
@@ -100,35 +185,77 @@ def _attach_temp_unit_metadata(result, temp_unit):
     else:
         result["metadata"] = {"temp_unit": temp_unit}
 
+@dataclass
+class _PromptRequest:
+    """Fields shared by /prompt and /prompt/stream, read and normalized once."""
+    user_prompt: str
+    location: dict
+    tone: str
+    session_id: Optional[str]
+    temp_unit: str
+
+def _read_prompt_request(data):
+    """Parse a prompt body, record the request metric and fall back to the default tone."""
+    tone = data.get("tone", "sarcastic")
+    session_id = data.get("session_id")
+    record_event_metric(
+        "weather_request_received",
+        location=_location_label_from_request_data(data),
+        tone=tone,
+        session_id=session_id,
+    )
+    if tone not in _VALID_TONES:
+        logger.debug("⚠️ Invalid tone %r, using default: sarcastic", tone)
+        tone = "sarcastic"
+    return _PromptRequest(
+        user_prompt=(data.get("prompt") or "").strip(),
+        location=data.get("location") or {},
+        tone=tone,
+        session_id=session_id,
+        temp_unit=_normalize_temp_unit(data.get("temp_unit", "C")),
+    )
+
+def _conversation_history(session_id):
+    """Last MAX_HISTORY_MESSAGES messages (6 exchanges by default) from SQLite, or None without a session."""
+    if not session_id:
+        return None
+    history = get_history_for_openai(session_id, exchanges=MAX_HISTORY_MESSAGES // 2)
+    logger.debug("💬 Loaded %d messages from SQLite history", len(history))
+    return history
+
+# GET / is static; encode it once. A fresh Response is still built per request because
+# after_request writes per-request headers (X-Request-ID) onto it.
+_HOME_BODY = orjson.dumps({
+    "service": "Mister Donkey Weather API",
+    "version": "2.0",
+    "features": [
+        "Weather forecasts",
+        "Tone selection (10 personalities)",
+        "Conversation history",
+        "City resolution",
+        "Auto-loading"
+    ],
+    "endpoints": {
+        "/prompt": "Main weather query endpoint",
+        "/geo/reverse": "Reverse geocoding",
+        "/geo/resolve": "Manual location resolution",
+        "/agents": "Scheduled weather agents",
+        "/conversation/new": "Create new conversation",
+        "/conversation/<id>": "Get conversation history",
+        "/tones": "List available tones"
+    }
+})
+
 @bp.route("/", methods=["GET"])
 def home():
     """GET / - Simple sanity-check endpoint."""
-    return jsonify({
-        "service": "Mister Donkey Weather API",
-        "version": "2.0",
-        "features": [
-            "Weather forecasts",
-            "Tone selection (10 personalities)",
-            "Conversation history",
-            "City resolution",
-            "Auto-loading"
-        ],
-        "endpoints": {
-            "/prompt": "Main weather query endpoint",
-            "/geo/reverse": "Reverse geocoding",
-            "/geo/resolve": "Manual location resolution",
-            "/agents": "Scheduled weather agents",
-            "/conversation/new": "Create new conversation",
-            "/conversation/<id>": "Get conversation history",
-            "/tones": "List available tones"
-        }
-    })
+    return Response(_HOME_BODY, mimetype="application/json")
 
 @bp.route("/geo/reverse", methods=["POST"])
 @cross_origin()
 def reverse_lookup():
     """POST /geo/reverse - Convert lat/lon to city name."""
-    data = request.get_json() or {}
+    data = request_body()
     lat = data.get("lat")
     lon = data.get("lon")
 
@@ -136,7 +263,7 @@ def reverse_lookup():
         return error_response("Missing 'lat' or 'lon' in request body.", ErrorCode.INVALID_REQUEST, 400)
 
     try:
-        city_name = reverse_geolocate(lat, lon)
+        city_name = cached_reverse_geolocate(lat, lon)
     except Exception as ex:
         return error_response(f"Reverse geolocation failed: {str(ex)}", ErrorCode.API_ERROR, 500)
 
@@ -149,7 +276,7 @@ def reverse_lookup():
 @cross_origin()
 def resolve_manual_location():
     """POST /geo/resolve - Convert manual city/postal input to lat/lon."""
-    data = request.get_json() or {}
+    data = request_body()
     query = (data.get("query") or "").strip()
 
     if len(query) < 2:
@@ -174,23 +301,35 @@ def resolve_manual_location():
 def get_all_agents():
     """GET /agents - Return list of scheduled agents."""
     try:
-        agents = get_agents()
-        return jsonify(agents)
+        version = agents_version()
+        etag = hashlib.blake2b(version.encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            body = _agents_body_cache.get(etag)
+            if body is None:
+                body = orjson.dumps(get_agents())
+                with _agents_body_lock:
+                    _agents_body_cache.clear()
+                    _agents_body_cache[etag] = body
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag, weak=True)
+        return response
     except Exception as ex:
         return error_response(f"Failed to retrieve agents: {str(ex)}", ErrorCode.INTERNAL_ERROR, 500)
 
 @bp.route("/agents", methods=["POST"])
 def add_or_update_agent():
     """POST /agents - Create/update scheduled Weather Agent."""
-    data = request.get_json() or {}
+    data = request_body()
 
-    required_fields = ["user_id", "city", "times", "timezone"]
-    missing = [f for f in required_fields if f not in data]
+    missing = _REQUIRED_AGENT_FIELD_SET - data.keys()
     if missing:
+        missing = [f for f in _REQUIRED_AGENT_FIELDS if f in missing]  # keep the documented order
         return error_response(f"Missing required fields: {', '.join(missing)}", ErrorCode.INVALID_REQUEST, 400)
 
     times = data.get("times")
-    if not isinstance(times, list) or not all(isinstance(t, str) and ":" in t for t in times):
+    if not isinstance(times, list) or not all(isinstance(t, str) and _HHMM_RE.fullmatch(t) for t in times):
         return error_response("Field 'times' must be a list of 'HH:MM' strings.", ErrorCode.INVALID_REQUEST, 400)
 
     try:
@@ -205,48 +344,49 @@ def add_or_update_agent():
         return error_response(f"Failed to save agent: {str(ex)}", ErrorCode.INTERNAL_ERROR, 500)
 
 # NEW: Tone management endpoints
-@bp.route("/tones", methods=["GET"])
-@cross_origin()
-def get_tones():
-    """GET /tones - List available personality tones"""
-    from dopplertower_engine import TONE_PRESETS
-
-    emoji_map = {
-        "sarcastic": "🙄",
-        "pirate": "🏴‍☠️",
-        "professional": "📊",
-        "hippie": "☮️",
-        "drill_sergeant": "🎖️",
-        "gen_z": "💅",
-        "noir_detective": "🕵️",
-        "shakespeare": "🎭",
-        "mobster": "🤌",
-        "doomsday": "☢️"
-    }
-
-    tones = []
-    for key, config in TONE_PRESETS.items():
-        tones.append({
+_TONE_EMOJI = {
+    "sarcastic": "🙄",
+    "pirate": "🏴‍☠️",
+    "professional": "📊",
+    "hippie": "☮️",
+    "drill_sergeant": "🎖️",
+    "gen_z": "💅",
+    "noir_detective": "🕵️",
+    "shakespeare": "🎭",
+    "mobster": "🤌",
+    "doomsday": "☢️"
+}
+
+# TONE_PRESETS is fixed at import, so the /tones body is serialized once
+_TONES_BODY = orjson.dumps({
+    "tones": [
+        {
             "id": key,
             "name": config.get("name", key.replace("_", " ").title()),
             "description": config.get("short_description", config["system_prompt"][:100] + "..."),
-            "emoji": emoji_map.get(key, "🌦️"),
+            "emoji": _TONE_EMOJI.get(key, "🌦️"),
             "character_slug": key.replace("_", "-"),
             "image": f"/characters/{key.replace('_', '-')}.png",
             "is_default": key == "sarcastic"
-        })
+        }
+        for key, config in TONE_PRESETS.items()
+    ],
+    "default": "sarcastic"
+})
 
-    return jsonify({
-        "tones": tones,
-        "default": "sarcastic"
-    })
+@bp.route("/tones", methods=["GET"])
+@cross_origin()
+def get_tones():
+    """GET /tones - List available personality tones"""
+    return Response(_TONES_BODY, mimetype="application/json",
+                    headers={"Cache-Control": "public, max-age=3600"})
 
 # NEW: Conversation management endpoints
 @bp.route("/conversation/new", methods=["POST"])
 @cross_origin()
 def new_conversation():
     """POST /conversation/new - Create a new conversation session"""
-    data = request.get_json() or {}
+    data = request_body()
     user_id = data.get("user_id")
     
     session_id = create_conversation()
@@ -274,7 +414,7 @@ def get_conversation_history(session_id: str):
     
     summary = conversation_manager.get_session_summary(session_id)
     
-    return jsonify({
+    return ojsonify({
         "session": summary,
         "messages": conversation_manager.get_conversation_history(session_id, format_for_openai=False)
     })
@@ -298,91 +438,80 @@ def handle_prompt():
     - Conversation continuity via 'session_id' parameter
     - Better city resolution (explicit cities override geolocation)
     """
-    data = request.get_json() or {}
-    user_prompt = (data.get("prompt") or "").strip()
-    location = data.get("location") or {}
+    data = request_body()
+    req = _read_prompt_request(data)
+    user_prompt, location, tone = req.user_prompt, req.location, req.tone
+    session_id, temp_unit = req.session_id, req.temp_unit
     is_auto_request = data.get("auto", False)
     debug_requested = bool(data.get("debug", False))
-    temp_unit = _normalize_temp_unit(data.get("temp_unit", "C"))
-    
-    # NEW: Tone and conversation parameters
-    tone = data.get("tone", "sarcastic")
-    session_id = data.get("session_id")
-    record_event_metric(
-        "weather_request_received",
-        location=_location_label_from_request_data(data),
-        tone=tone,
-        session_id=session_id,
-    )
-
-    # Validate tone
-    from dopplertower_engine import TONE_PRESETS
-    if tone not in TONE_PRESETS:
-        tone = "sarcastic"
-        print(f"⚠️ Invalid tone '{data.get('tone')}', using default: sarcastic")
 
     # Extract location data early
     lat = location.get("lat")
     lon = location.get("lon")
 
-    # Enhanced debug logging
-    if debug_requested or is_auto_request:
-        print(f"\n🔍 Debug enabled: auto={is_auto_request}, debug={debug_requested}, tone={tone}")
-        print(f"📝 Input prompt: '{user_prompt}'")
-        print(f"📍 Location data: {json.dumps(location)}")
+    # Enhanced debug logging (level checked once so prod skips the whole block)
+    debug_logging = logger.isEnabledFor(logging.DEBUG)
+    if debug_logging and (debug_requested or is_auto_request):
+        logger.debug("🔍 Debug enabled: auto=%s, debug=%s, tone=%s", is_auto_request, debug_requested, tone)
+        logger.debug("📝 Input prompt: %r", user_prompt)
+        logger.debug("📍 Location data: %s", location)
         if session_id:
-            print(f"💬 Session ID: {session_id}")
+            logger.debug("💬 Session ID: %s", session_id)
         if lat is not None and lon is not None:
-            print(f"📍 Coordinates: {lat}, {lon}")
-        print("-" * 50)
+            logger.debug("📍 Coordinates: %s, %s", lat, lon)
     
     # 1) City Resolver: Preprocess user prompt
     try:
-        modified_prompt, resolved_city, resolver_metadata = resolve_city_context(user_prompt, location)
+        if not user_prompt and lat is not None and lon is not None and not location.get("name"):
+            # Coordinates only (auto-load): the resolver has nothing to find, go straight
+            # to the reverse-geocode injection below
+            modified_prompt, resolved_city, resolver_metadata = coords_only_context()
+        else:
+            modified_prompt, resolved_city, resolver_metadata = cached_resolve_city_context(user_prompt, location)
     except Exception as ex:
-        error_trace = traceback.format_exc()
-        print(f"❌ ERROR in /prompt:\n{error_trace}")
+        logger.exception("❌ City resolver failed in /prompt")
         if session_id:
             session_logger.log_error(session_id, f"City resolver error: {str(ex)}")
-        return error_response(
-            str(ex), ErrorCode.INTERNAL_ERROR, 500,
-            trace=error_trace if ENV == "dev" else None,
-        )
+        return _exception_response(ex, ErrorCode.INTERNAL_ERROR)
 
     # Enhanced debugging
-    if is_auto_request:
-        print(f"🧠 Auto-load Resolver Debug: {json.dumps(resolver_metadata)}")
-        print(f"🧠 Auto-load Modified Prompt: '{modified_prompt}'")
-        print(f"🧠 Auto-load Resolved City: '{resolved_city}'")
-    else:
-        print("🧠 Resolver Debug:", json.dumps(resolver_metadata))
+    if debug_logging:
+        if is_auto_request:
+            logger.debug("🧠 Auto-load Resolver Debug: %s", resolver_metadata)
+            logger.debug("🧠 Auto-load Modified Prompt: %r", modified_prompt)
+            logger.debug("🧠 Auto-load Resolved City: %r", resolved_city)
+        else:
+            logger.debug("🧠 Resolver Debug: %s", resolver_metadata)
+
+    # Case-folded once; the two injection branches below are mutually exclusive
+    mp_lower = modified_prompt.casefold()
 
     # If city was resolved but stripped from prompt, put it back
-    if resolved_city and resolved_city.lower() not in modified_prompt.lower():
+    if resolved_city and not _city_in(mp_lower, resolved_city):
         modified_prompt = f"{modified_prompt} in {resolved_city}"
-        print(f"🔁 Re-injected resolved city into prompt: '{modified_prompt}'")
+        logger.debug("🔁 Re-injected resolved city into prompt: %r", modified_prompt)
 
     # 2) Reverse geocoding fallback for auto requests
     if lat is not None and lon is not None and not resolved_city:
         try:
-            fallback_city = reverse_geolocate(lat, lon)
+            fallback_city = cached_reverse_geolocate(lat, lon)
         except Exception as ex:
-            print(f"⚠️ Reverse geocode error: {str(ex)}")
+            logger.warning("⚠️ Reverse geocode error: %s", ex)
             fallback_city = None
 
         if fallback_city:
             clean_city = fallback_city.split(",")[0].strip()
 
-            if clean_city.lower() not in modified_prompt.lower():
+            if not _city_in(mp_lower, clean_city):
                 if modified_prompt:
                     modified_prompt = f"{modified_prompt} in {clean_city}"
                 else:
                     modified_prompt = f"Weather in {clean_city}"
                 
                 if is_auto_request:
-                    print(f"🤖 Auto-load: Injected fallback city: '{modified_prompt}'")
+                    logger.debug("🤖 Auto-load: Injected fallback city: %r", modified_prompt)
                 else:
-                    print(f"🔄 Injecting cleaned fallback city into prompt: '{modified_prompt}'")
+                    logger.debug("🔄 Injecting cleaned fallback city into prompt: %r", modified_prompt)
 
     # 3) Validate we have a prompt
     if not modified_prompt:
@@ -393,20 +522,31 @@ def handle_prompt():
 
     modified_prompt = _append_temperature_unit_instruction(modified_prompt, temp_unit)
 
-    # Load conversation history from SQLite (last 6 exchanges = 12 messages)
-    conversation_history = None
-    if session_id:
-        conversation_history = get_history_for_openai(session_id, exchanges=6)
-        print(f"💬 Loaded {len(conversation_history)} messages from SQLite history")
+    conversation_history = _conversation_history(session_id)
+
+    # Conversations and explicit debug requests always run the full pipeline
+    cache_key = None
+    cached_result = None
+    if not session_id and not debug_requested:
+        cache_key = _prompt_cache_key(modified_prompt, location, tone)
+        with _prompt_result_lock:
+            cached_result = _prompt_result_cache.get(cache_key)
 
     # 4) Process the prompt with tone and conversation
     try:
-        result = process_prompt_from_app_structured(
-            modified_prompt,
-            location=location,
-            tone=tone,
-            conversation_history=conversation_history
-        )
+        if cached_result is not None:
+            result = _response_copy(cached_result)
+            result["cached"] = True
+            logger.debug("💾 /prompt result cache hit: %s", cache_key)
+        else:
+            result = process_prompt_from_app_structured(
+                modified_prompt,
+                location=location,
+                tone=tone,
+                conversation_history=conversation_history
+            )
+            if cache_key:
+                _store_prompt_result(cache_key, result)
 
         # Persist exchange to SQLite
         if session_id:
@@ -436,13 +576,15 @@ def handle_prompt():
         if is_auto_request:
             result["auto_loaded"] = True
             result["auto_prompt"] = modified_prompt
-            print(f"🤖 Auto-load successful for prompt: '{modified_prompt}'")
+            logger.debug("🤖 Auto-load successful for prompt: %r", modified_prompt)
         
-        return jsonify(result)
+        return ojsonify(result)
     
     except Exception as ex:
         error_msg = str(ex)
-        error_trace = traceback.format_exc()
+        # Logged (and formatted) once by the logging module; the response only
+        # carries the trace in dev
+        logger.exception("❌ ERROR in process_prompt_from_app (auto=%s)", is_auto_request)
 
         # Log error to session if session_id exists
         if session_id:
@@ -450,16 +592,16 @@ def handle_prompt():
 
         debug_info = {
             "error": error_msg,
-            "trace": error_trace if ENV == "dev" else "Enable dev mode for trace",
+            "error_type": type(ex).__name__,
+            "trace": _dev_trace() or "Enable dev mode for trace",
             "debug_enabled": debug_requested or is_auto_request
         }
 
         if is_auto_request:
-            print(f"🛑 Auto-load failed: {error_msg}")
             error_msg = f"Auto-loading failed: {error_msg}"
 
-        print(f"❌ ERROR in process_prompt_from_app:\n{error_trace}")
-        return error_response(error_msg, ErrorCode.API_ERROR, 500, debug_info=debug_info)
+        # Trace already lives in debug_info; don't format it a second time at the top level
+        return error_response(error_msg, ErrorCode.API_ERROR, 500, error_type=type(ex).__name__, debug_info=debug_info)
 
 
 @bp.route("/prompt/structured", methods=["POST"])
@@ -480,9 +622,7 @@ def vitamin_d():
     Returns: { vitamin_d_index, synthesis_minutes, recommendation,
                uv_index, sun_elevation, cloud_factor, skin_type_label, ... }
     """
-    from vitamin_d_forecast import get_vitamin_d_forecast
-
-    data = request.get_json() or {}
+    data = request_body()
     lat = data.get("lat")
     lon = data.get("lon")
     skin_type = data.get("skin_type", 3)
@@ -505,16 +645,14 @@ def vitamin_d():
         return error_response("skin_type must be an integer 1–6", ErrorCode.INVALID_REQUEST, 400)
 
     if session_id:
-        print(f"☀️ /vitamin-d request | session={session_id} | ({lat:.3f}, {lon:.3f}) | skin={skin_type}")
+        logger.debug("☀️ /vitamin-d request | session=%s | (%.3f, %.3f) | skin=%s", session_id, lat, lon, skin_type)
 
     try:
         result = get_vitamin_d_forecast(lat, lon, skin_type)
-        return jsonify(result)
+        return ojsonify(result)
     except Exception as ex:
-        error_trace = traceback.format_exc()
-        print(f"❌ ERROR in /vitamin-d:\n{error_trace}")
-        return error_response(str(ex), ErrorCode.API_ERROR, 500,
-                              trace=error_trace if ENV == "dev" else None)
+        logger.exception("❌ ERROR in /vitamin-d")
+        return _exception_response(ex, ErrorCode.API_ERROR)
 
 
 @bp.route("/history/<session_id>", methods=["GET"])
@@ -522,15 +660,14 @@ def vitamin_d():
 def get_history(session_id: str):
     """GET /history/<session_id> — last 20 exchanges as JSON."""
     messages = get_history_raw(session_id, exchanges=20)
-    return jsonify({"session_id": session_id, "messages": messages, "count": len(messages)})
+    return ojsonify({"session_id": session_id, "messages": messages, "count": len(messages)})
 
 
 @bp.route("/metrics/share", methods=["POST"])
 @cross_origin()
 def metrics_share():
     """POST /metrics/share - Minimal share conversion event."""
-    data = request.get_json(silent=True) if request.is_json else {}
-    data = data if isinstance(data, dict) else {}
+    data = request_body()
     record_event_metric(
         "share_event_received",
         endpoint="/metrics/share",
@@ -546,8 +683,7 @@ def metrics_share():
 @cross_origin()
 def metrics_kofi_click():
     """POST /metrics/kofi-click - Minimal Ko-fi click conversion event."""
-    data = request.get_json(silent=True) if request.is_json else {}
-    data = data if isinstance(data, dict) else {}
+    data = request_body()
     record_event_metric(
         "kofi_click_received",
         endpoint="/metrics/kofi-click",
@@ -564,39 +700,25 @@ def metrics_kofi_click():
 @prompt_rate_limit
 def handle_prompt_stream():
     """POST /prompt/stream - SSE version of /prompt with structured weather parity."""
-    from dopplertower_engine import TONE_PRESETS
-
-    data = request.get_json() or {}
-    user_prompt = (data.get("prompt") or "").strip()
-    location    = data.get("location") or {}
-    tone        = data.get("tone", "sarcastic")
-    session_id  = data.get("session_id")
-    temp_unit   = _normalize_temp_unit(data.get("temp_unit", "C"))
-    record_event_metric(
-        "weather_request_received",
-        location=_location_label_from_request_data(data),
-        tone=tone,
-        session_id=session_id,
-    )
-
-    if tone not in TONE_PRESETS:
-        tone = "sarcastic"
+    req = _read_prompt_request(request_body())
+    user_prompt, location, tone = req.user_prompt, req.location, req.tone
+    session_id, temp_unit = req.session_id, req.temp_unit
 
     if not user_prompt:
         return error_response("Missing prompt", ErrorCode.INVALID_REQUEST, 400)
 
-    conv_history = get_history_for_openai(session_id, exchanges=6) if session_id else None
+    conv_history = _conversation_history(session_id)
     req_id = g.get("request_id", "")
     prompt_for_processing = _append_temperature_unit_instruction(user_prompt, temp_unit)
 
-    print(f"🌊 /prompt/stream | session={session_id} | tone={tone}")
+    logger.debug("🌊 /prompt/stream | session=%s | tone=%s", session_id, tone)
 
     def text_chunks(text: str, size: int = 60):
         for index in range(0, len(text), size):
             yield text[index:index + size]
 
     def generate():
-        yield f"event: meta\ndata: {json.dumps({'request_id': req_id, 'session_id': session_id, 'temp_unit': temp_unit}, ensure_ascii=False)}\n\n"
+        yield f"event: meta\ndata: {dumps_json({'request_id': req_id, 'session_id': session_id, 'temp_unit': temp_unit})}\n\n"
         try:
             result = process_prompt_from_app_structured(
                 prompt_for_processing,
@@ -612,7 +734,7 @@ def handle_prompt_stream():
             weather_payload["session_id"] = session_id
             weather_payload["tone"] = tone
             _attach_temp_unit_metadata(weather_payload, temp_unit)
-            yield f"event: weather\ndata: {json.dumps(weather_payload, ensure_ascii=False)}\n\n"
+            yield f"event: weather\ndata: {dumps_json(weather_payload)}\n\n"
 
             text = result.get("text_summary") or result.get("summary") or ""
             for chunk in text_chunks(text):
@@ -624,12 +746,14 @@ def handle_prompt_stream():
 
             yield "data: [DONE]\n\n"
         except Exception as ex:
+            logger.exception("❌ ERROR in /prompt/stream")
             if session_id:
                 session_logger.log_error(session_id, f"Stream prompt processing error: {str(ex)}")
             payload = {"error": str(ex), "request_id": req_id}
-            if ENV == "dev":
-                payload["trace"] = traceback.format_exc()
-            yield f"event: error\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            trace = _dev_trace()
+            if trace:
+                payload["trace"] = trace
+            yield f"event: error\ndata: {dumps_json(payload)}\n\n"
         return
 
     return Response(
@@ -1,156 +1,269 @@
 """
 Session Logger - Tracks session metrics and logs to JSON file
+
+State lives in memory (self.sessions). Each mutation is appended as one line to
+a JSONL journal next to the snapshot file; compact() folds the journal back into
+the snapshot. Request-time cost is a dict update plus a single append, no matter
+how many sessions have been logged.
+
+Worker processes share the files: every read or write holds an exclusive lock
+on <log>.lock and first replays what other processes appended since last time.
 """
-import json
 import os
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional
 from threading import Lock
 
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # Windows dev runs are single-process; the thread lock is enough
+    fcntl = None
+
+# Journal lines appended before the snapshot is rewritten and the journal truncated
+COMPACT_EVERY = int(os.getenv("SESSION_LOG_COMPACT_EVERY", "500"))
+
+# (epoch second, ISO string) for that second; replaced as one tuple so threads
+# never see a mismatched pair
+_ts_cache = (0, "")
+
+
+def _now_iso() -> str:
+    """Local ISO timestamp at second resolution, formatted once per second."""
+    global _ts_cache
+    second = int(time.time())
+    cached_second, cached_iso = _ts_cache
+    if second != cached_second:
+        cached_iso = datetime.fromtimestamp(second).isoformat()
+        _ts_cache = (second, cached_iso)
+    return cached_iso
+
+
 class SessionLogger:
     def __init__(self, log_file: str = "sessions_log.json"):
         self.log_file = log_file
-        self.lock = Lock()
-        self._ensure_log_file_exists()
+        self.journal_file = os.path.splitext(log_file)[0] + ".jsonl"
+        self.lock = Lock()  # threads of this process; _locked() adds the file lock
+        self._lock_fd = os.open(f"{log_file}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self.day_counts: dict = {}  # DDMMYY prefix -> sessions issued that day
+        self.sessions: dict = {}
+        # (journal inode, snapshot mtime) replayed so far; changes when any process compacts
+        self._generation = None
+        self._journal_pos = 0
+        self._journal_lines = 0
+        with self._locked():
+            self._ensure_log_file_exists()
+            self._sync()
+            if self._journal_lines:
+                self._compact()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access across threads and, where fcntl exists, processes."""
+        with self.lock:
+            if fcntl:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
 
     def _ensure_log_file_exists(self):
         """Create log file if it doesn't exist"""
         if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w') as f:
-                json.dump({"sessions": []}, f, indent=2)
+            self._write_snapshot()
+
+    def _load_snapshot(self):
+        """Replace in-memory state with the snapshot file."""
+        with open(self.log_file, 'rb') as f:
+            snapshot = orjson.loads(f.read() or b'{"sessions": []}')
+        self.sessions = {session["session_id"]: session for session in snapshot.get("sessions", [])}
+
+        day_counts: dict = {}
+        for session_id in self.sessions:
+            prefix = session_id[:6]
+            day_counts[prefix] = day_counts.get(prefix, 0) + 1
+        # Snapshots also carry IDs that were handed out but never created as sessions
+        for prefix, count in snapshot.get("day_counts", {}).items():
+            day_counts[prefix] = max(day_counts.get(prefix, 0), count)
+        for prefix, count in day_counts.items():
+            self.day_counts[prefix] = max(self.day_counts.get(prefix, 0), count)
+
+    def _sync(self):
+        """Replay journal lines this process hasn't seen; caller holds _locked().
+
+        If another process compacted in the meantime, start over from its snapshot.
+        """
+        try:
+            journal = os.stat(self.journal_file)
+        except FileNotFoundError:
+            journal = None
+        size = journal.st_size if journal else 0
+        generation = (journal.st_ino if journal else None, os.stat(self.log_file).st_mtime_ns)
+
+        if generation != self._generation or size < self._journal_pos:
+            self._load_snapshot()
+            self._generation = generation
+            self._journal_pos = 0
+            self._journal_lines = 0
+
+        if size <= self._journal_pos:
+            return
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._journal_pos)
+            data = f.read()
+        self._journal_pos += len(data)
+        for line in data.splitlines():
+            try:
+                self._apply(orjson.loads(line))
+            except (orjson.JSONDecodeError, KeyError):
+                continue  # torn line from a crash mid-append
+            self._journal_lines += 1
+
+    def _write_snapshot(self):
+        """Atomically rewrite the snapshot file from self.sessions"""
+        tmp_path = f"{self.log_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({"sessions": list(self.sessions.values()), "day_counts": self.day_counts},
+                                 option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, self.log_file)
+
+    def _append(self, event: dict):
+        """Journal one mutation; caller holds _locked() and has just synced"""
+        with open(self.journal_file, 'ab') as f:
+            f.write(orjson.dumps(event) + b"\n")
+            self._journal_pos = f.tell()
+            self._generation = (os.fstat(f.fileno()).st_ino, self._generation[1])
+        self._journal_lines += 1
+
+    def _apply(self, event: dict) -> Optional[dict]:
+        """Apply a journal event to self.sessions; returns the touched session"""
+        op = event["op"]
+        if op == "id":
+            self.day_counts[event["day"]] = max(self.day_counts.get(event["day"], 0), event["n"])
+            return None
+        if op == "create":
+            session = dict(event["session"])
+            self.sessions[session["session_id"]] = session
+            return session
 
-    def _read_log(self) -> dict:
-        """Read the current log file"""
-        with open(self.log_file, 'r') as f:
-            return json.load(f)
+        session = self.sessions.get(event["sid"])
+        if session is None:
+            return None
 
-    def _write_log(self, data: dict):
-        """Write to the log file"""
-        with open(self.log_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        if op == "+p":
+            session["prompts_count"] = session.get("prompts_count", 0) + 1
+        elif op == "+r":
+            session["responses_count"] = session.get("responses_count", 0) + 1
+        elif op == "set":
+            if event.get("prompts") is not None:
+                session["prompts_count"] = event["prompts"]
+            if event.get("responses") is not None:
+                session["responses_count"] = event["responses"]
+        if event.get("error"):
+            session.setdefault("errors", []).append(event["error"])
+        session["last_updated"] = event["ts"]
+        return session
+
+    def _record(self, event: dict) -> Optional[dict]:
+        """Apply an event and journal it if it touched a known session"""
+        with self._locked():
+            self._sync()
+            session = self._apply(event)
+            if session is not None:
+                self._append(event)
+                if self._journal_lines >= COMPACT_EVERY:
+                    self._compact()
+        return session
+
+    def compact(self):
+        """Fold the journal into the snapshot file and start an empty journal."""
+        with self._locked():
+            self._sync()
+            self._compact()
+
+    def _compact(self):
+        """compact() body; caller holds _locked() and has just synced.
+
+        The journal is replaced rather than truncated so other processes see a
+        new inode and reload the snapshot instead of reading at a stale offset.
+        """
+        self._write_snapshot()
+        tmp_path = f"{self.journal_file}.tmp"
+        open(tmp_path, 'wb').close()
+        os.replace(tmp_path, self.journal_file)
+        self._generation = (os.stat(self.journal_file).st_ino, os.stat(self.log_file).st_mtime_ns)
+        self._journal_pos = 0
+        self._journal_lines = 0
 
     def generate_session_id(self) -> str:
         """
         Generate session ID in format: DDMMYYXX
         Where XX is the count of sessions for that day
         """
-        with self.lock:
-            now = datetime.now()
-            date_prefix = now.strftime("%d%m%y")
-
-            log_data = self._read_log()
-
-            # Count sessions for today
-            today_sessions = [
-                s for s in log_data["sessions"]
-                if s["session_id"].startswith(date_prefix)
-            ]
+        date_prefix = datetime.now().strftime("%d%m%y")
 
-            session_count = len(today_sessions) + 1
-            session_id = f"{date_prefix}{session_count:02d}"
+        # Journaled so every worker sees the number as taken before it can reuse it
+        with self._locked():
+            self._sync()
+            session_count = self.day_counts.get(date_prefix, 0) + 1
+            event = {"op": "id", "day": date_prefix, "n": session_count}
+            self._apply(event)
+            self._append(event)
 
-            return session_id
+        return f"{date_prefix}{session_count:02d}"
 
     def create_session(self, session_id: str) -> dict:
         """Create a new session entry in the log"""
-        with self.lock:
-            log_data = self._read_log()
-
-            session_entry = {
-                "session_id": session_id,
-                "created_at": datetime.now().isoformat(),
-                "prompts_count": 0,
-                "responses_count": 0,
-                "errors": []
-            }
+        session_entry = {
+            "session_id": session_id,
+            "created_at": _now_iso(),
+            "prompts_count": 0,
+            "responses_count": 0,
+            "errors": []
+        }
+        self._record({"op": "create", "session": session_entry})
 
-            log_data["sessions"].append(session_entry)
-            self._write_log(log_data)
-
-            print(f"📝 Session logged: {session_id}")
-            return session_entry
+        print(f"📝 Session logged: {session_id}")
+        return session_entry
 
     def update_session(self, session_id: str, prompts: Optional[int] = None,
                       responses: Optional[int] = None, error: Optional[str] = None):
         """Update session metrics"""
-        with self.lock:
-            log_data = self._read_log()
-
-            # Find the session
-            session = None
-            for s in log_data["sessions"]:
-                if s["session_id"] == session_id:
-                    session = s
-                    break
-
-            if not session:
-                print(f"⚠️ Session {session_id} not found in log")
-                return
-
-            # Update metrics
-            if prompts is not None:
-                session["prompts_count"] = prompts
-            if responses is not None:
-                session["responses_count"] = responses
-            if error:
-                session["errors"].append({
-                    "timestamp": datetime.now().isoformat(),
-                    "error": error
-                })
-
-            session["last_updated"] = datetime.now().isoformat()
-            self._write_log(log_data)
+        now = _now_iso()
+        event = {"op": "set", "sid": session_id, "ts": now, "prompts": prompts, "responses": responses}
+        if error:
+            event["error"] = {"timestamp": now, "error": error}
+
+        if self._record(event) is None:
+            print(f"⚠️ Session {session_id} not found in log")
 
     def increment_prompts(self, session_id: str):
         """Increment prompt count for a session"""
-        with self.lock:
-            log_data = self._read_log()
-
-            for session in log_data["sessions"]:
-                if session["session_id"] == session_id:
-                    session["prompts_count"] = session.get("prompts_count", 0) + 1
-                    session["last_updated"] = datetime.now().isoformat()
-                    self._write_log(log_data)
-                    return
+        self._record({"op": "+p", "sid": session_id, "ts": _now_iso()})
 
     def increment_responses(self, session_id: str):
         """Increment response count for a session"""
-        with self.lock:
-            log_data = self._read_log()
-
-            for session in log_data["sessions"]:
-                if session["session_id"] == session_id:
-                    session["responses_count"] = session.get("responses_count", 0) + 1
-                    session["last_updated"] = datetime.now().isoformat()
-                    self._write_log(log_data)
-                    return
+        self._record({"op": "+r", "sid": session_id, "ts": _now_iso()})
 
     def log_error(self, session_id: str, error: str):
         """Log an error for a session"""
-        with self.lock:
-            log_data = self._read_log()
-
-            for session in log_data["sessions"]:
-                if session["session_id"] == session_id:
-                    if "errors" not in session:
-                        session["errors"] = []
-                    session["errors"].append({
-                        "timestamp": datetime.now().isoformat(),
-                        "error": error
-                    })
-                    session["last_updated"] = datetime.now().isoformat()
-                    self._write_log(log_data)
-                    return
+        now = _now_iso()
+        self._record({"op": "err", "sid": session_id, "ts": now,
+                      "error": {"timestamp": now, "error": error}})
 
     def get_session_stats(self, session_id: str) -> Optional[dict]:
         """Get statistics for a specific session"""
-        log_data = self._read_log()
-
-        for session in log_data["sessions"]:
-            if session["session_id"] == session_id:
-                return session
-
-        return None
+        with self._locked():
+            self._sync()
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            return {**session, "errors": list(session.get("errors", []))}
 
 # Global instance
 session_logger = SessionLogger()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Small standard-library verification for the coordinates-only /prompt fast path."""
+from city_resolver import coords_only_context, resolve_city_context
+
+
+def main():
+    for location in ({"lat": 45.76, "lon": 4.83}, {"lat": "48.85", "lon": "2.35"}, {"lat": 0, "lon": 0}):
+        slow_prompt, slow_city, slow_meta = resolve_city_context("", location)
+        fast_prompt, fast_city, fast_meta = coords_only_context()
+
+        assert fast_prompt == slow_prompt == ""
+        assert fast_city is slow_city is None
+        assert fast_meta.pop("fast_path") is True
+        assert fast_meta == slow_meta, (fast_meta, slow_meta)
+
+    # A frontend-provided name is resolved by the slow path, so routes must not take the fast path
+    _, named_city, _ = resolve_city_context("", {"lat": 45.76, "lon": 4.83, "name": "Lyon, France"})
+    assert named_city == "Lyon, France"
+
+    print("City resolver fast path test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,31 @@ Tests that search_city_with_weatherapi properly disambiguates cities
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Set up environment
 from dopplertower_engine import search_city_with_weatherapi
 
-def test_city_search(city_name, user_lat=None, user_lon=None):
-    """Test searching for a city and print results"""
+# (query, user_lat, user_lon)
+CASES = [
+    ("Paris", None, None),                    # Paris, France without user location
+    ("Paris", 40.7128, -74.0060),             # NYC user: still Paris, France (exact match bonus)
+    ("London", None, None),                   # London, UK
+    ("Springfield", None, None),              # ambiguous US city - should pick one with good score
+    ("Windsor", 43.6532, -79.3832),           # Toronto user: should prefer Windsor, ON
+    ("Tokyo", None, None),                    # unambiguous
+    ("Portland", 47.6062, -122.3321),         # Seattle user: should prefer Portland, OR
+    ("Melbourne", -33.8688, 151.2093),        # Sydney user: should prefer Melbourne, AU
+]
+
+def print_city_search(city_name, result, user_lat=None, user_lon=None):
+    """Print the outcome of one search"""
     print(f"\n{'='*60}")
     print(f"Testing: '{city_name}'")
     if user_lat and user_lon:
         print(f"User location: {user_lat}, {user_lon}")
     print(f"{'='*60}")
 
-    result = search_city_with_weatherapi(city_name, user_lat=user_lat, user_lon=user_lon)
-
     if result:
         print(f"✅ Found: {result['full_name']}")
         print(f"   Coordinates: {result['lat']}, {result['lon']}")
@@ -28,6 +39,10 @@ def test_city_search(city_name, user_lat=None, user_lon=None):
     else:
         print(f"❌ No results found for '{city_name}'")
 
+def test_city_search(city_name, user_lat=None, user_lon=None):
+    """Test searching for a city and print results"""
+    result = search_city_with_weatherapi(city_name, user_lat=user_lat, user_lon=user_lon)
+    print_city_search(city_name, result, user_lat, user_lon)
     return result
 
 
@@ -37,29 +52,16 @@ def main():
     print("Testing that the disambiguator properly prioritizes cities")
     print("instead of blindly returning first US/CA result\n")
 
-    # Test 1: Paris (should return Paris, France without user location)
-    test_city_search("Paris")
-
-    # Test 2: Paris with US user location (should still return Paris, France due to exact match bonus)
-    test_city_search("Paris", user_lat=40.7128, user_lon=-74.0060)  # NYC
-
-    # Test 3: London (should return London, UK)
-    test_city_search("London")
-
-    # Test 4: Springfield (ambiguous US city - should pick one with good score)
-    test_city_search("Springfield")
-
-    # Test 5: Windsor with Canadian user location (should prefer Windsor, ON)
-    test_city_search("Windsor", user_lat=43.6532, user_lon=-79.3832)  # Toronto
-
-    # Test 6: Tokyo (unambiguous)
-    test_city_search("Tokyo")
-
-    # Test 7: Portland with US West Coast user (should prefer Portland, OR)
-    test_city_search("Portland", user_lat=47.6062, user_lon=-122.3321)  # Seattle
+    # Searches are independent network round trips: run them together, then
+    # print in case order so the output reads the same as a sequential run
+    with ThreadPoolExecutor(max_workers=len(CASES)) as executor:
+        results = list(executor.map(
+            lambda case: search_city_with_weatherapi(case[0], user_lat=case[1], user_lon=case[2]),
+            CASES,
+        ))
 
-    # Test 8: Melbourne with Australian user (should prefer Melbourne, AU)
-    test_city_search("Melbourne", user_lat=-33.8688, user_lon=151.2093)  # Sydney
+    for (city_name, user_lat, user_lon), result in zip(CASES, results):
+        print_city_search(city_name, result, user_lat, user_lon)
 
     print("\n" + "=" * 60)
     print("✅ Testing complete!")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Small standard-library verification for the shared /prompt result cache."""
+import routes
+
+
+def _result(fallback_used, quota_status="allowed"):
+    return {
+        "text_summary": "Roast",
+        "metadata": {
+            "fallback_used": fallback_used,
+            "quota_status": quota_status,
+            "quota_details": {"allowed": not fallback_used, "daily_count": 7},
+            "cache_key_parts": {"ip": "caller-a"},
+        },
+    }
+
+
+def main():
+    routes._prompt_result_cache.clear()
+
+    # One caller's quota-exceeded fallback is never replayed to another caller
+    limited_key = routes._prompt_cache_key("Weather in Paris", {"lat": 48.85, "lon": 2.35}, "sarcastic")
+    routes._store_prompt_result(limited_key, _result(True, "limited"))
+    assert limited_key not in routes._prompt_result_cache
+
+    routes._store_prompt_result(limited_key, {"error": "boom", "metadata": {"fallback_used": False}})
+    assert limited_key not in routes._prompt_result_cache
+
+    # A real result is shared, minus the fields that describe the first caller
+    routes._store_prompt_result(limited_key, _result(False))
+    cached = routes._prompt_result_cache[limited_key]
+    assert "quota_details" not in cached["metadata"]
+    assert "cache_key_parts" not in cached["metadata"]
+    assert cached["metadata"]["quota_status"] == "allowed"
+
+    print("Prompt result cache test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Small standard-library verification for batched request metrics."""
+import os
+import tempfile
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["REQUEST_METRICS_DB_PATH"] = os.path.join(tmpdir, "request_metrics_test.db")
+
+        import request_metrics
+
+        request_metrics.REQUEST_METRICS_DB_PATH = os.environ["REQUEST_METRICS_DB_PATH"]
+        request_metrics.init_metrics_db()
+
+        for index in range(250):
+            request_metrics.record_request_metric(
+                "POST",
+                "/prompt",
+                500 if index % 50 == 0 else 200,
+                100 + index,
+                session_id="session-1",
+                request_id=f"request-{index}",
+            )
+        request_metrics.flush_request_metrics()
+
+        summary = request_metrics.get_metrics_summary(days=1)
+        assert summary["request_count_7d"] == 250
+        assert summary["error_rate_7d"] == 2.0
+        assert summary["p95_response_time"] == 337.0
+
+    print("Request metrics test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Small standard-library verification for the journaled session logger."""
+import os
+import tempfile
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        from session_logger import SessionLogger
+
+        log_file = os.path.join(tmpdir, "sessions_log.json")
+        logger = SessionLogger(log_file)
+
+        session_id = logger.generate_session_id()
+        logger.create_session(session_id)
+        for _ in range(3):
+            logger.increment_prompts(session_id)
+        logger.increment_responses(session_id)
+        logger.log_error(session_id, "boom")
+        logger.increment_prompts("missing-session")
+
+        stats = logger.get_session_stats(session_id)
+        assert stats["prompts_count"] == 3
+        assert stats["responses_count"] == 1
+        assert [e["error"] for e in stats["errors"]] == ["boom"]
+        assert logger.get_session_stats("missing-session") is None
+        assert logger.generate_session_id() != session_id
+
+        # A fresh instance replays the journal on top of the snapshot
+        reloaded = SessionLogger(log_file)
+        assert reloaded.get_session_stats(session_id) == stats
+        assert os.path.getsize(reloaded.journal_file) == 0
+
+        # Two workers on one log: compacting in one keeps the other's appends
+        worker_b = SessionLogger(log_file)
+        logger.increment_prompts(session_id)
+        worker_b.increment_prompts(session_id)
+        logger.compact()
+        worker_b.increment_responses(session_id)
+        for instance in (logger, worker_b, SessionLogger(log_file)):
+            merged = instance.get_session_stats(session_id)
+            assert merged["prompts_count"] == 5
+            assert merged["responses_count"] == 2
+
+        # IDs stay unique across workers, including across a compaction
+        issued = []
+        for _ in range(5):
+            issued.append(logger.generate_session_id())
+            issued.append(worker_b.generate_session_id())
+        worker_b.compact()
+        issued.append(logger.generate_session_id())
+        issued.append(SessionLogger(log_file).generate_session_id())
+        assert len(set(issued)) == len(issued)
+
+    print("Session logger test passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import json
 from enum import Enum
 from datetime import datetime, timezone
-from flask import jsonify, g, has_request_context
+import orjson
+from flask import Response, jsonify, g, has_request_context, request
 
 
 class ErrorCode(str, Enum):
@@ -33,3 +35,44 @@ def error_response(
     # Strip None-valued extras so they don't pollute prod responses
     body.update({k: v for k, v in extra.items() if v is not None})
     return jsonify(body), http_status
+
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps_json(payload) -> str:
+    """Compact UTF-8 JSON text via orjson (stdlib fallback), e.g. for SSE data lines."""
+    try:
+        return orjson.dumps(payload, option=_ORJSON_OPTIONS).decode()
+    except TypeError:
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def ojsonify(payload, http_status: int = 200) -> Response:
+    """jsonify() equivalent backed by orjson, for large nested response bodies.
+
+    Falls back to Flask's encoder for anything orjson can't serialize.
+    """
+    try:
+        body = orjson.dumps(payload, option=_ORJSON_OPTIONS)
+    except TypeError:
+        response = jsonify(payload)
+        response.status_code = http_status
+        return response
+    return Response(body, status=http_status, mimetype="application/json")
+
+
+def request_body() -> dict:
+    """JSON object body of the current request, or {} if absent/invalid.
+
+    Reuses the dict main.before_request already parsed into g.request_json,
+    so route handlers don't decode the same body a second time.
+    """
+    data = g.get("request_json")
+    if data is None:
+        raw = request.get_data(cache=True)
+        try:
+            data = orjson.loads(raw) if raw else {}
+        except orjson.JSONDecodeError:
+            data = {}
+    return data if isinstance(data, dict) else {}
@@ -1,22 +1,30 @@
 # weather_agent.py
 # Proactive weather‐monitoring “agent” for Mister Donkey
 
-import time
 import threading
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from dopplertower_engine import get_openweather_current, get_openweather_forecast, get_weather_alerts
-from geo_utils_helper import reverse_geolocate
-from push_helper import send_push_firebase as send_push_notification, send_email_alert
-import json
+from geo_utils_helper import cached_reverse_geolocate
+from push_helper import send_push_batch, send_email_alert
+import orjson
 import os
 import hmac
+from contextlib import contextmanager
 from functools import wraps
 from flask import Blueprint, request, jsonify
 import sqlite3
-from typing import Dict, List, Optional, Any
+from utils import request_body
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Dict, List, Optional, Any, Tuple
 
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "").strip()
 
+ALERT_LOG_DIR = "agent_alerts"
+MAX_OPEN_ALERT_LOGS = 128  # per-user alert log handles kept open (LRU)
+
 def get_agent_check_interval_seconds() -> int:
     """
     Return proactive weather-agent polling interval in seconds.
@@ -46,6 +54,46 @@ def require_admin(f):
         return f(*args, **kwargs)
     return decorated
 
+@dataclass(slots=True)
+class AgentWarning:
+    """One candidate alert produced by a weather check."""
+    type: str
+    message: str
+    severity: str = "medium"  # low / medium / high
+    source: str = "unknown"
+    time: Optional[datetime] = None
+
+# Severity rank for threshold filtering, and the console emoji per severity
+_SEV_LEVEL = {"low": 1, "medium": 2, "high": 3}
+_SEV_EMOJI = {"low": "💡", "medium": "⚠️", "high": "🚨"}
+
+def _parse_history_cursor(raw: str) -> Tuple[str, int]:
+    """
+    Turn a /history `before` cursor ("<ISO time>[,<id>]") into (sent_at, id) for
+    a keyset compare. sent_at is SQLite CURRENT_TIMESTAMP: UTC, whole seconds.
+    Naive times are taken as UTC; a fractional second rounds up, since every row
+    stamped in that second is still before it. Raises ValueError if malformed.
+    """
+    ts_part, _, id_part = raw.strip().partition(",")
+    ts = datetime.fromisoformat(ts_part.strip().replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    if ts.microsecond:
+        ts = ts.replace(microsecond=0) + timedelta(seconds=1)
+    row_id = int(id_part) if id_part.strip() else 0
+    return ts.strftime("%Y-%m-%d %H:%M:%S"), row_id
+
+def _history_cursor(alert: Dict[str, Any]) -> str:
+    """Cursor that resumes right after this alert_history row."""
+    return f"{alert['sent_at'].replace(' ', 'T')},{alert['id']}"
+
+def _weather_fingerprint(current: Dict, forecast: Dict) -> bytes:
+    """8-byte digest of the fields that move when OpenWeather publishes new data."""
+    current = current or {}
+    slots = (forecast or {}).get("list") or [{}]
+    key = (current.get("dt"), (current.get("main") or {}).get("temp"), slots[0].get("dt"))
+    return blake2b(repr(key).encode(), digest_size=8).digest()
+
 # Create Flask blueprint for weather-agent endpoints
 weather_agent_bp = Blueprint("weather_agent", __name__)
 
@@ -63,6 +111,7 @@ class WeatherAgent:
         }
 
         self.running = False
+        self._stop_event = threading.Event()  # set by stop_monitoring to cut the wait short
         # self.check_interval = 300  # REMOVED/STABILIZED: 5-minute polling is too aggressive for production agent use.
         self.check_interval = get_agent_check_interval_seconds()
         print(f"🤖 Weather Agent check interval set to {self.check_interval} seconds")
@@ -70,15 +119,53 @@ class WeatherAgent:
         # Where we store sessions + history
         self.db_path = "weather_agent.db"
 
+        # Per-user weather checks are independent HTTP round trips; run them side by side
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="agent-check")
+        # The three OpenWeather calls inside one check also overlap; kept well under
+        # the engine's HTTP connection pool (pool_maxsize) so sockets get reused
+        self._fetch_pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="agent-fetch")
+
+        # Per-user alert logs stay open between ticks (LRU, see _log_alerts_to_file)
+        os.makedirs(ALERT_LOG_DIR, exist_ok=True)
+        self._log_handles: "OrderedDict[str, Any]" = OrderedDict()
+        self._log_lock = threading.Lock()
+
         # DISABLE GPT‐analysis for now (stub “call_gpt_weather_analysis” isn’t defined in your engine)
         self.gpt_analysis_enabled = False
 
+        # One long-lived connection shared by the monitor thread and request threads;
+        # sqlite3 connections aren't safe for concurrent use, so access goes through _db()
+        self._conn = self._connect()
+        self._conn_lock = threading.Lock()
+
         # Create or migrate DB tables
         self._init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the agent DB with the per-connection PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL; fsync at checkpoints only
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _db(self):
+        """Serialized access to the shared connection; commits on success, rolls back on error."""
+        with self._conn_lock, self._conn:
+            yield self._conn
+
     def _init_database(self):
         """Initialize SQLite DB for persistent sessions + history."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db() as conn:
+            # _load_sessions_from_db hands purged pages back with incremental_vacuum, which
+            # needs auto_vacuum=INCREMENTAL. An existing file only switches modes after a
+            # full VACUUM, so that runs once, the first time this code sees the file.
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            # WAL is persistent in the DB file, so setting it once here covers every connection
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS user_sessions (
                     user_id TEXT PRIMARY KEY,
@@ -86,14 +173,15 @@ class WeatherAgent:
                     lat REAL,
                     lon REAL,
                     location_name TEXT,
-                    start_time TEXT,
-                    end_time TEXT,
+                    start_time INTEGER,
+                    end_time INTEGER,
                     baseline_weather TEXT,
-                    last_alert_time TEXT,
+                    last_alert_time INTEGER,
                     notification_preferences TEXT,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            self._migrate_session_times(conn)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS alert_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -105,6 +193,70 @@ class WeatherAgent:
                     FOREIGN KEY (user_id) REFERENCES user_sessions (user_id)
                 )
             """)
+            # get_alert_history: seek by user on the (sent_at, id) keyset, newest first, no sort step
+            conn.execute("DROP INDEX IF EXISTS idx_alerts_user_time")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_user_time_id "
+                "ON alert_history (user_id, sent_at DESC, id DESC)"
+            )
+            # _load_sessions_from_db: WHERE end_time > ?
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sessions_end "
+                "ON user_sessions (end_time)"
+            )
+
+    @staticmethod
+    def _migrate_session_times(conn: sqlite3.Connection):
+        """
+        Older databases stored start/end/last-alert times as ISO TEXT columns.
+        Rebuild user_sessions with INTEGER (unix seconds) columns so end_time
+        compares numerically; TEXT affinity would turn the ints back into strings.
+        """
+        col_types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(user_sessions)")}
+        if col_types.get("end_time", "").upper() != "TEXT":
+            return
+
+        def to_epoch(value):
+            if value is None or isinstance(value, (int, float)):
+                return value
+            return int(datetime.fromisoformat(value).timestamp())
+
+        # DDL autocommits under sqlite3's default isolation level; BEGIN makes the
+        # whole rebuild one transaction so a failure can't leave it half done.
+        # Build-then-rename (not rename-then-build) keeps alert_history's
+        # REFERENCES user_sessions pointing at the right table.
+        conn.execute("BEGIN")
+        try:
+            rows = conn.execute("""
+                SELECT user_id, email, lat, lon, location_name, start_time, end_time,
+                       baseline_weather, last_alert_time, notification_preferences, created_at
+                FROM user_sessions
+            """).fetchall()
+            conn.execute("""
+                CREATE TABLE user_sessions_new (
+                    user_id TEXT PRIMARY KEY,
+                    email TEXT,
+                    lat REAL,
+                    lon REAL,
+                    location_name TEXT,
+                    start_time INTEGER,
+                    end_time INTEGER,
+                    baseline_weather TEXT,
+                    last_alert_time INTEGER,
+                    notification_preferences TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.executemany(
+                "INSERT INTO user_sessions_new VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row[:5] + (to_epoch(row[5]), to_epoch(row[6]), row[7], to_epoch(row[8])) + row[9:] for row in rows],
+            )
+            conn.execute("DROP TABLE user_sessions")
+            conn.execute("ALTER TABLE user_sessions_new RENAME TO user_sessions")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
 
     def register_user_session(
         self,
@@ -121,7 +273,7 @@ class WeatherAgent:
         """
         try:
             # Reverse‐geocode to human‐readable location
-            location_name = reverse_geolocate(lat, lon) or f"{lat:.2f}, {lon:.2f}"
+            location_name = cached_reverse_geolocate(lat, lon) or f"{lat:.2f}, {lon:.2f}"
 
             # Grab baseline weather so we can detect changes “since monitoring started”
             current_weather = get_openweather_current(lat, lon)
@@ -135,16 +287,17 @@ class WeatherAgent:
                     "severity_threshold": "medium",  # low / medium / high
                 }
 
+            now = datetime.now()
             sess = {
                 "lat": lat,
                 "lon": lon,
                 "location_name": location_name,
                 "email": email,
-                "start_time": datetime.now(),
-                "end_time": datetime.now() + timedelta(hours=duration_hours),
-                "last_check": datetime.now(),
+                "start_time": now,
+                "end_time": now + timedelta(hours=duration_hours),
+                "last_check": now,
                 "baseline_weather": current_weather,
-                "last_alert_time": None,
+                "last_alert_at": {},   # warning type -> epoch seconds of its last send
                 "alert_cooldown": 30,  # minutes between the same alert
                 "notification_prefs": notification_prefs,
                 "alert_count": 0,
@@ -170,32 +323,45 @@ class WeatherAgent:
 
     def _save_session_to_db(self, user_id: str, session_data: Dict):
         """Persist or update a user_session row in the DB."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db() as conn:
             conn.execute("""
-                INSERT OR REPLACE INTO user_sessions
+                INSERT INTO user_sessions
                 (user_id, email, lat, lon, location_name, start_time, end_time, baseline_weather, notification_preferences)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    email = excluded.email,
+                    lat = excluded.lat,
+                    lon = excluded.lon,
+                    location_name = excluded.location_name,
+                    start_time = excluded.start_time,
+                    end_time = excluded.end_time,
+                    baseline_weather = excluded.baseline_weather,
+                    notification_preferences = excluded.notification_preferences
             """, (
                 user_id,
                 session_data.get("email"),
                 session_data["lat"],
                 session_data["lon"],
                 session_data["location_name"],
-                session_data["start_time"].isoformat(),
-                session_data["end_time"].isoformat(),
-                json.dumps(session_data["baseline_weather"]),
-                json.dumps(session_data["notification_prefs"])
+                int(session_data["start_time"].timestamp()),
+                int(session_data["end_time"].timestamp()),
+                orjson.dumps(session_data["baseline_weather"]).decode(),
+                orjson.dumps(session_data["notification_prefs"]).decode()
             ))
 
     def _load_sessions_from_db(self):
-        """On startup, load any non‐expired sessions from DB back into memory."""
-        now_iso = datetime.now().isoformat()
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        On startup, load any non‐expired sessions from DB back into memory,
+        and purge the expired ones (e.g. left behind by a crash) in the same transaction.
+        """
+        now = datetime.now()
+        now_ts = int(now.timestamp())
+        with self._db() as conn:
             cursor = conn.execute("""
-                SELECT user_id, email, lat, lon, location_name, start_time, end_time, baseline_weather, last_alert_time, notification_preferences
+                SELECT user_id, email, lat, lon, location_name, start_time, end_time, baseline_weather, notification_preferences
                 FROM user_sessions
                 WHERE end_time > ?
-            """, (now_iso,))
+            """, (now_ts,))
 
             for row in cursor.fetchall():
                 user_id = row[0]
@@ -204,49 +370,73 @@ class WeatherAgent:
                     "lon": row[3],
                     "location_name": row[4],
                     "email": row[1],
-                    "start_time": datetime.fromisoformat(row[5]),
-                    "end_time": datetime.fromisoformat(row[6]),
-                    "baseline_weather": json.loads(row[7]) if row[7] else None,
-                    "last_alert_time": datetime.fromisoformat(row[8]) if row[8] else None,
+                    "start_time": datetime.fromtimestamp(row[5]),
+                    "end_time": datetime.fromtimestamp(row[6]),
+                    "baseline_weather": orjson.loads(row[7]) if row[7] else None,
+                    "last_alert_at": {},
                     "alert_cooldown": 30,
-                    "notification_prefs": json.loads(row[9]) if row[9] else {},
+                    "notification_prefs": orjson.loads(row[8]) if row[8] else {},
                     "alert_count": 0,
-                    "last_check": datetime.now(),
+                    "last_check": now,
                 }
                 self.active_sessions[user_id] = session_data
                 print(f"🔄 Restored session for {user_id} at {session_data['location_name']}")
 
-    def check_weather_changes(self, user_id: str, session_data: Dict) -> List[Dict]:
+            purged = conn.execute("DELETE FROM user_sessions WHERE end_time <= ?", (now_ts,)).rowcount
+            if purged:
+                print(f"🗑️ Purged {purged} expired session(s) from DB")
+                # Each result row is one freed page; step it to the end to free them all
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def check_weather_changes(self, user_id: str, session_data: Dict, now: Optional[datetime] = None) -> List[AgentWarning]:
         """
         Check if weather has changed significantly since baseline or next‐3hr forecast.
-        Returns a list of “warning” dicts (possibly empty).
+        Returns a list of AgentWarning (possibly empty). `now` is the monitor tick's clock.
         """
+        now = now or datetime.now()
         try:
             lat, lon = session_data["lat"], session_data["lon"]
-            current_weather = get_openweather_current(lat, lon)
-            forecast = get_openweather_forecast(lat, lon)
-            alerts_data = get_weather_alerts(lat, lon)
-
-            warnings: List[Dict] = []
-
-            # 1) Threshold‐based alerts (e.g. temp difference ≥ threshold)
-            thresh_warnings = self._check_threshold_alerts(session_data, current_weather, forecast)
-            warnings.extend(thresh_warnings)
-
-            # 2) GPT‐based analysis (DISABLED by default)
-            if self.gpt_analysis_enabled:
-                gpt_warnings = self._check_gpt_analysis(session_data, current_weather, forecast)
-                warnings.extend(gpt_warnings)
+            current_f = self._fetch_pool.submit(get_openweather_current, lat, lon)
+            forecast_f = self._fetch_pool.submit(get_openweather_forecast, lat, lon)
+            alerts_f = self._fetch_pool.submit(get_weather_alerts, lat, lon)
+            current_weather = current_f.result()
+            forecast = forecast_f.result()
+            alerts_data = alerts_f.result()
+
+            warnings: List[AgentWarning] = []
+
+            # Same observation + first forecast slot as last tick → reuse that tick's
+            # derived warnings instead of recomputing them. They still go through
+            # _filter_warnings, so one held back by its cooldown is offered again later.
+            wx_hash = _weather_fingerprint(current_weather, forecast)
+            last_hash, last_derived = session_data.get("last_wx", (None, []))
+            if wx_hash == last_hash:
+                # Only forecast slots still ahead of us, as _check_upcoming_changes would give
+                warnings.extend(w for w in last_derived if w.time is None or w.time > now)
+            else:
+                derived: List[AgentWarning] = []
+
+                # 1) Threshold‐based alerts (e.g. temp difference ≥ threshold)
+                thresh_warnings = self._check_threshold_alerts(session_data, current_weather, forecast, now)
+                derived.extend(thresh_warnings)
+
+                # 2) GPT‐based analysis (DISABLED by default)
+                if self.gpt_analysis_enabled:
+                    gpt_warnings = self._check_gpt_analysis(session_data, current_weather, forecast)
+                    derived.extend(gpt_warnings)
+
+                session_data["last_wx"] = (wx_hash, derived)
+                warnings.extend(derived)
 
             # 3) “Official” severe alerts from the API
             if alerts_data:
                 for alert in alerts_data:
-                    warnings.append({
-                        "type": "severe_alert",
-                        "message": f"🚨 {alert.get('event','Weather Alert')}: {alert.get('desc','')[:100]}...",
-                        "severity": "high",
-                        "source": "official_alert"
-                    })
+                    warnings.append(AgentWarning(
+                        type="severe_alert",
+                        message=f"🚨 {alert.get('event','Weather Alert')}: {alert.get('desc','')[:100]}...",
+                        severity="high",
+                        source="official_alert",
+                    ))
 
             return warnings
 
@@ -254,46 +444,50 @@ class WeatherAgent:
             print(f"❌ Error checking weather for {user_id}: {e}")
             return []
 
-    def _check_threshold_alerts(self, session_data: Dict, current: Dict, forecast: Dict) -> List[Dict]:
+    def _check_threshold_alerts(self, session_data: Dict, current: Dict, forecast: Dict, now: datetime) -> List[AgentWarning]:
         """
         Compare “baseline” vs. current to see if temp changed by ≥ threshold.
         Also check next‐3hr forecast for temp, precipitation, wind changes.
         """
-        warnings: List[Dict] = []
+        warnings: List[AgentWarning] = []
+        temp_thr = self.alert_thresholds["temp_change"]
         baseline = session_data.get("baseline_weather")
         if baseline and baseline.get("main") and current.get("main"):
             b_temp = baseline["main"].get("temp")
             c_temp = current["main"].get("temp")
             if b_temp is not None and c_temp is not None:
                 diff = abs(c_temp - b_temp)
-                if diff >= self.alert_thresholds["temp_change"]:
-                    warnings.append({
-                        "type": "temperature_change",
-                        "message": f"🌡️ Temperature changed by {diff:.1f}°C since start ({b_temp:.1f}°C ➡ {c_temp:.1f}°C)",
-                        "severity": "medium",
-                        "source": "threshold"
-                    })
+                if diff >= temp_thr:
+                    warnings.append(AgentWarning(
+                        type="temperature_change",
+                        message=f"🌡️ Temperature changed by {diff:.1f}°C since start ({b_temp:.1f}°C ➡ {c_temp:.1f}°C)",
+                        severity="medium",
+                        source="threshold",
+                    ))
 
         # Next 3hr forecast checks
         if forecast and forecast.get("list"):
-            upcoming = self._check_upcoming_changes(current, forecast)
+            upcoming = self._check_upcoming_changes(current, forecast, now)
             warnings.extend(upcoming)
 
         return warnings
 
-    def _check_gpt_analysis(self, session_data: Dict, current: Dict, forecast: Dict) -> List[Dict]:
+    def _check_gpt_analysis(self, session_data: Dict, current: Dict, forecast: Dict) -> List[AgentWarning]:
         """
         Stub GPT‐analysis (disabled). If you later implement `call_gpt_weather_analysis`, re‐enable.
         """
         # This block never runs, because self.gpt_analysis_enabled=False
         return []
 
-    def _check_upcoming_changes(self, current: Dict, forecast: Dict) -> List[Dict]:
+    def _check_upcoming_changes(self, current: Dict, forecast: Dict, now: datetime) -> List[AgentWarning]:
         """
         Inspect the next 3 forecast entries for temp jumps, rain start, high wind, severe conditions.
         """
-        warnings: List[Dict] = []
-        now = datetime.now()
+        warnings: List[AgentWarning] = []
+        thresholds = self.alert_thresholds
+        temp_thr = thresholds["temp_change"]
+        rain_thr = thresholds["precipitation_start"]
+        wind_thr = thresholds["wind_speed"]
 
         try:
             c_temp = current.get("main", {}).get("temp")
@@ -309,71 +503,67 @@ class WeatherAgent:
                 f_cond = item.get("weather", [{}])[0].get("main", "")
                 f_rain = item.get("rain", {}).get("1h", 0) or 0
                 f_wind = item.get("wind", {}).get("speed", 0) or 0
-                f_label = f_time.strftime("%H:%M")
+                f_label = f"{f_time.hour:02d}:{f_time.minute:02d}"
 
                 # Temp changes
                 if c_temp is not None and f_temp is not None:
                     delta = f_temp - c_temp
-                    if abs(delta) >= self.alert_thresholds["temp_change"]:
+                    if abs(delta) >= temp_thr:
                         direction = "drop" if delta < 0 else "rise"
-                        warnings.append({
-                            "type": "upcoming_temp_change",
-                            "message": f"🌡️ Temperature will {direction} by {abs(delta):.1f}°C by {f_label} ({c_temp:.1f}°C ➡ {f_temp:.1f}°C)",
-                            "severity": "medium",
-                            "time": f_time,
-                            "source": "threshold"
-                        })
+                        warnings.append(AgentWarning(
+                            type="upcoming_temp_change",
+                            message=f"🌡️ Temperature will {direction} by {abs(delta):.1f}°C by {f_label} ({c_temp:.1f}°C ➡ {f_temp:.1f}°C)",
+                            severity="medium",
+                            time=f_time,
+                            source="threshold",
+                        ))
 
                 # Precipitation start
-                if f_rain > self.alert_thresholds["precipitation_start"] and "Rain" not in c_cond:
-                    warnings.append({
-                        "type": "rain_starting",
-                        "message": f"☔ Rain expected around {f_label} ({f_rain:.1f}mm/h predicted)",
-                        "severity": "medium",
-                        "time": f_time,
-                        "source": "threshold"
-                    })
+                if f_rain > rain_thr and "Rain" not in c_cond:
+                    warnings.append(AgentWarning(
+                        type="rain_starting",
+                        message=f"☔ Rain expected around {f_label} ({f_rain:.1f}mm/h predicted)",
+                        severity="medium",
+                        time=f_time,
+                        source="threshold",
+                    ))
 
                 # High winds
-                if f_wind > self.alert_thresholds["wind_speed"]:
-                    warnings.append({
-                        "type": "high_wind",
-                        "message": f"💨 Strong winds expected around {f_label} ({f_wind:.1f} m/s ≈ {f_wind * 3.6:.1f} km/h)",
-                        "severity": "medium",
-                        "time": f_time,
-                        "source": "threshold"
-                    })
+                if f_wind > wind_thr:
+                    warnings.append(AgentWarning(
+                        type="high_wind",
+                        message=f"💨 Strong winds expected around {f_label} ({f_wind:.1f} m/s ≈ {f_wind * 3.6:.1f} km/h)",
+                        severity="medium",
+                        time=f_time,
+                        source="threshold",
+                    ))
 
                 # Severe conditions (e.g. Thunderstorm/Snow)
-                if c_cond != f_cond and f_cond in ["Thunderstorm", "Snow"]:
-                    warnings.append({
-                        "type": "severe_weather",
-                        "message": f"⛈️ {f_cond} expected around {f_label}",
-                        "severity": "high",
-                        "time": f_time,
-                        "source": "threshold"
-                    })
+                if c_cond != f_cond and f_cond in ("Thunderstorm", "Snow"):
+                    warnings.append(AgentWarning(
+                        type="severe_weather",
+                        message=f"⛈️ {f_cond} expected around {f_label}",
+                        severity="high",
+                        time=f_time,
+                        source="threshold",
+                    ))
 
         except Exception as e:
             print(f"⚠️ Error checking upcoming changes: {e}")
 
         return warnings
 
-    def _should_send_alert(self, user_id: str, warning_type: str) -> bool:
+    def _should_send_alert(self, user_id: str, warning_type: str, now_ts: float) -> bool:
         """
-        Check if cooldown has elapsed since last_alert_time for this warning_type.
+        Check if cooldown has elapsed since this warning_type was last sent to the user.
+        Each type has its own clock, so one alert doesn't mute the others.
         """
         session = self.active_sessions.get(user_id)
         if not session:
             return False
 
-        last = session.get("last_alert_time")
-        if not last:
-            return True
-
-        cooldown_min = session.get("alert_cooldown", 30)
-        elapsed_min = (datetime.now() - last).total_seconds() / 60
-        return elapsed_min >= cooldown_min
+        last = session.get("last_alert_at", {}).get(warning_type, 0.0)
+        return last + session.get("alert_cooldown", 30) * 60 <= now_ts
 
     def monitor_all_users(self):
         """
@@ -383,7 +573,9 @@ class WeatherAgent:
         while self.running:
             try:
                 now = datetime.now()
+                now_ts = now.timestamp()
                 to_remove: List[str] = []
+                futures = {}
 
                 for user_id, sess in list(self.active_sessions.items()):
                     # If session expired ⏰
@@ -391,29 +583,62 @@ class WeatherAgent:
                         to_remove.append(user_id)
                         continue
 
-                    # Check for warnings (list of dicts)
-                    warnings = self.check_weather_changes(user_id, sess)
+                    # Woken early for another session's expiry: not due yet
+                    if now < sess.get("next_check", now):
+                        continue
+
+                    # Check for warnings (list of AgentWarning); fetches run on the pool
+                    futures[self._pool.submit(self.check_weather_changes, user_id, sess, now)] = (user_id, sess)
+
+                # Filtering, sending and session bookkeeping stay on this thread;
+                # pushes for the whole tick go out together in batched FCM calls
+                pushes: List[tuple] = []
+                for future in as_completed(futures):
+                    user_id, sess = futures[future]
+                    warnings = future.result()
                     if warnings:
-                        filt = self._filter_warnings(user_id, warnings)
+                        filt = self._filter_warnings(user_id, warnings, now_ts)
                         if filt:
-                            self._send_alerts(user_id, sess, filt)
-                            sess["last_alert_time"] = now
+                            self._send_alerts(user_id, sess, filt, now, pushes)
+                            last_alert_at = sess.setdefault("last_alert_at", {})
+                            for w in filt:
+                                last_alert_at[w.type] = now_ts
                             sess["alert_count"] += len(filt)
 
                     sess["last_check"] = now
+                    sess["next_check"] = now + timedelta(seconds=self.check_interval)
+
+                if pushes:
+                    self._send_pushes(pushes)
 
                 # Clean up any expired sessions
                 for uid in to_remove:
                     print(f"🗑️ Removing expired session for {uid}")
-                    self._cleanup_expired_session(uid)
+                    self._cleanup_expired_session(uid, now)
 
-                time.sleep(self.check_interval)
+                self._stop_event.wait(timeout=self._next_tick_delay())
 
             except Exception as e:
                 print(f"❌ Error in monitoring loop: {e}")
-                time.sleep(60)
+                self._stop_event.wait(timeout=60)
+
+    def _next_tick_delay(self) -> float:
+        """
+        Seconds until the next session check is due or the next session expires,
+        whichever is sooner, capped at check_interval.
+        """
+        now = datetime.now()
+        wake_times = []
+        for sess in list(self.active_sessions.values()):
+            wake_times.append(sess.get("next_check", now))
+            wake_times.append(sess["end_time"])
+        if not wake_times:
+            return self.check_interval
+
+        delay = (min(wake_times) - now).total_seconds()
+        return min(max(delay, 1.0), self.check_interval)
 
-    def _filter_warnings(self, user_id: str, warnings: List[Dict]) -> List[Dict]:
+    def _filter_warnings(self, user_id: str, warnings: List[AgentWarning], now_ts: float) -> List[AgentWarning]:
         """
         Given a list of potential warnings, only keep those above the user's severity threshold
         AND respecting the cooldown for that warning type.
@@ -424,31 +649,32 @@ class WeatherAgent:
 
         pref = session.get("notification_prefs", {})
         thresh_level = pref.get("severity_threshold", "medium")
-        levels = {"low": 1, "medium": 2, "high": 3}
-        min_lvl = levels.get(thresh_level, 2)
+        min_lvl = _SEV_LEVEL.get(thresh_level, 2)
 
-        filtered: List[Dict] = []
+        filtered: List[AgentWarning] = []
         for w in warnings:
-            lvl = levels.get(w.get("severity", "medium"), 2)
-            if lvl >= min_lvl and self._should_send_alert(user_id, w["type"]):
+            lvl = _SEV_LEVEL.get(w.severity, 2)
+            if lvl >= min_lvl and self._should_send_alert(user_id, w.type, now_ts):
                 filtered.append(w)
 
         return filtered
 
-    def _send_alerts(self, user_id: str, session_data: Dict, warnings: List[Dict]):
+    def _send_alerts(self, user_id: str, session_data: Dict, warnings: List[AgentWarning], now: datetime,
+                     pushes: Optional[List[tuple]] = None):
         """
         Send alerts via whichever channels are in session_data['notification_prefs'].
-        Then log to DB + disk.
+        Then log to DB + disk. Pass `pushes` to queue the push for a batched send
+        (see _send_pushes) instead of sending it right away.
         """
         location = session_data["location_name"]
         prefs = session_data.get("notification_prefs", {})
 
         alert_title = f"Weather Alert for {location}"
-        alert_body = "\n".join([w["message"] for w in warnings])
+        alert_body = "\n".join([w.message for w in warnings])
 
         # 1) Log to a per-user file if requested
         if prefs.get("log_file", True):
-            self._log_alerts_to_file(user_id, location, warnings)
+            self._log_alerts_to_file(user_id, location, warnings, now)
 
         # 2) Email
         if prefs.get("email", False) and session_data.get("email"):
@@ -465,12 +691,10 @@ class WeatherAgent:
 
         # 3) Push (Firebase)
         if prefs.get("push", True):
-            try:
-                # In push_helper, send_push_notification now points to Firebase version
-                send_push_notification(user_id, alert_title, alert_body)
-                print(f"📱 Push notification sent to {user_id}")
-            except Exception as e:
-                print(f"❌ Failed to send push to {user_id}: {e}")
+            if pushes is not None:
+                pushes.append((user_id, alert_title, alert_body))
+            else:
+                self._send_pushes([(user_id, alert_title, alert_body)])
 
         # 4) Save to alert_history table
         self._save_alerts_to_history(user_id, warnings)
@@ -478,48 +702,69 @@ class WeatherAgent:
         # 5) Debug‐print to console
         print(f"🚨 ALERTS for {user_id} at {location}:")
         for w in warnings:
-            emoji = {"low": "💡", "medium": "⚠️", "high": "🚨"}.get(w.get("severity", "medium"), "⚠️")
-            print(f"  {emoji} {w['message']} [{w.get('source','unknown')}]")
+            emoji = _SEV_EMOJI.get(w.severity, "⚠️")
+            print(f"  {emoji} {w.message} [{w.source}]")
 
-    def _log_alerts_to_file(self, user_id: str, location: str, warnings: List[Dict]):
+    def _send_pushes(self, pushes: List[tuple]):
+        """Send queued (user_id, title, body) pushes in batched FCM calls."""
+        try:
+            sent = send_push_batch(pushes)
+            print(f"📱 Push notifications sent: {sent}/{len(pushes)}")
+        except Exception as e:
+            print(f"❌ Failed to send {len(pushes)} push notification(s): {e}")
+
+    def _log_alerts_to_file(self, user_id: str, location: str, warnings: List[AgentWarning], now: datetime):
         """
         Append warnings → a per-user log file under folder “agent_alerts/”.
+        Handles are reused across ticks; the least recently used is closed past MAX_OPEN_ALERT_LOGS.
         """
-        log_dir = "agent_alerts"
-        os.makedirs(log_dir, exist_ok=True)
-        safe_name = user_id.replace("@", "_at_")
-        log_file = os.path.join(log_dir, f"{safe_name}.log")
-        with open(log_file, "a") as f:
-            f.write(f"\n=== {datetime.now().isoformat()} ===\n")
-            f.write(f"📍 Location: {location}\n")
-            for w in warnings:
-                f.write(f"{w['message']} [Source: {w.get('source','unknown')}]\n")
-
-    def _save_alerts_to_history(self, user_id: str, warnings: List[Dict]):
-        """Insert each warning into the alert_history table."""
-        with sqlite3.connect(self.db_path) as conn:
-            for w in warnings:
-                conn.execute("""
-                    INSERT INTO alert_history (user_id, alert_type, message, severity)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    user_id,
-                    w["type"],
-                    w["message"],
-                    w.get("severity", "medium")
-                ))
-
-    def _cleanup_expired_session(self, user_id: str):
+        lines = [f"\n=== {now.isoformat()} ===\n", f"📍 Location: {location}\n"]
+        lines.extend(f"{w.message} [Source: {w.source}]\n" for w in warnings)
+
+        with self._log_lock:
+            f = self._log_handles.get(user_id)
+            if f is None:
+                safe_name = user_id.replace("@", "_at_")
+                f = open(os.path.join(ALERT_LOG_DIR, f"{safe_name}.log"), "a")
+                self._log_handles[user_id] = f
+                if len(self._log_handles) > MAX_OPEN_ALERT_LOGS:
+                    _, oldest = self._log_handles.popitem(last=False)
+                    oldest.close()
+            else:
+                self._log_handles.move_to_end(user_id)
+            f.write("".join(lines))
+            f.flush()
+
+    def _close_alert_logs(self):
+        """Close every cached per-user log handle."""
+        with self._log_lock:
+            while self._log_handles:
+                _, f = self._log_handles.popitem()
+                f.close()
+
+    def _save_alerts_to_history(self, user_id: str, warnings: List[AgentWarning]):
+        """Insert all warnings into the alert_history table in one transaction."""
+        with self._db() as conn:
+            conn.executemany("""
+                INSERT INTO alert_history (user_id, alert_type, message, severity)
+                VALUES (?, ?, ?, ?)
+            """, [
+                (user_id, w.type, w.message, w.severity)
+                for w in warnings
+            ])
+
+    def _cleanup_expired_session(self, user_id: str, now: Optional[datetime] = None):
         """Remove user_id from memory + mark in DB as expired."""
+        now_ts = int((now or datetime.now()).timestamp())
         if user_id in self.active_sessions:
             del self.active_sessions[user_id]
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db() as conn:
             conn.execute("""
                 UPDATE user_sessions
                 SET end_time = ?
                 WHERE user_id = ? 
                   AND end_time > ?
-            """, (datetime.now().isoformat(), user_id, datetime.now().isoformat()))
+            """, (now_ts, user_id, now_ts))
 
     def start_monitoring(self):
         """
@@ -528,6 +773,7 @@ class WeatherAgent:
         """
         if not self.running:
             self._load_sessions_from_db()
+            self._stop_event.clear()
             self.running = True
             self.monitor_thread = threading.Thread(target=self.monitor_all_users, daemon=True)
             self.monitor_thread.start()
@@ -537,6 +783,8 @@ class WeatherAgent:
     def stop_monitoring(self):
         """Stop the background monitoring thread."""
         self.running = False
+        self._stop_event.set()
+        self._close_alert_logs()
         print("🛑 Weather Agent monitoring stopped")
 
     def get_user_status(self, user_id: str) -> Dict[str, Any]:
@@ -554,23 +802,42 @@ class WeatherAgent:
             "notification_preferences": sess.get("notification_prefs", {}),
         }
 
-    def get_alert_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Fetch the most recent `limit` rows from alert_history for this user."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT alert_type, message, severity, sent_at
+    def get_alert_history(self, user_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch the most recent `limit` rows from alert_history for this user.
+        Pass `before` (see _parse_history_cursor / _history_cursor) for the next,
+        older page. Alerts sent in one batch share sent_at, so rows are keyed on
+        (sent_at, id). Raises ValueError for a malformed cursor.
+        """
+        if before:
+            sql = """
+                SELECT id, alert_type, message, severity, sent_at
+                FROM alert_history
+                WHERE user_id = ? AND (sent_at, id) < (?, ?)
+                ORDER BY sent_at DESC, id DESC
+                LIMIT ?
+            """
+            params = (user_id, *_parse_history_cursor(before), limit)
+        else:
+            sql = """
+                SELECT id, alert_type, message, severity, sent_at
                 FROM alert_history
                 WHERE user_id = ?
-                ORDER BY sent_at DESC
+                ORDER BY sent_at DESC, id DESC
                 LIMIT ?
-            """, (user_id, limit))
+            """
+            params = (user_id, limit)
+
+        with self._db() as conn:
+            cursor = conn.execute(sql, params)
             rows = cursor.fetchall()
             return [
                 {
-                    "type": row[0],
-                    "message": row[1],
-                    "severity": row[2],
-                    "sent_at": row[3]
+                    "id": row[0],
+                    "type": row[1],
+                    "message": row[2],
+                    "severity": row[3],
+                    "sent_at": row[4]
                 }
                 for row in rows
             ]
@@ -582,6 +849,8 @@ weather_agent = WeatherAgent()
 # ‣ Flask‐exposed endpoints
 # ================================
 
+_START_AGENT_FIELDS = frozenset({"user_id", "lat", "lon"})
+
 @weather_agent_bp.route("/start-agent", methods=["POST"])
 @require_admin
 def start_agent_endpoint():
@@ -589,9 +858,8 @@ def start_agent_endpoint():
     POST /start-agent
     Body JSON: { user_id: str, lat: float, lon: float, duration_hours?: int, email?: str, notification_preferences?: object }
     """
-    data = request.get_json() or {}
-    req_fields = ["user_id", "lat", "lon"]
-    if not all(f in data for f in req_fields):
+    data = request_body()
+    if not _START_AGENT_FIELDS <= data.keys():
         return jsonify({"error": "Missing required fields: user_id, lat, lon"}), 400
 
     result = weather_agent.register_user_session(
@@ -611,7 +879,7 @@ def stop_agent_endpoint():
     POST /stop-agent
     Body JSON: { user_id: str }
     """
-    data = request.get_json() or {}
+    data = request_body()
     user_id = data.get("user_id")
     if not user_id:
         return jsonify({"error": "Missing user_id"}), 400
@@ -633,12 +901,19 @@ def get_status_endpoint(user_id: str):
 @weather_agent_bp.route("/history/<string:user_id>", methods=["GET"])
 def get_history_endpoint(user_id: str):
     """
-    GET /history/<user_id>?limit=50
-    Returns up to `limit` alerts from alert_history for that user.
+    GET /history/<user_id>?limit=50&before=2025-01-31T12:00:00Z
+    Returns up to `limit` alerts from alert_history for that user, newest first.
+    `before` is a time (UTC unless it carries an offset) or the `next_before`
+    cursor of the previous page; `next_before` is null on the last page.
     """
     limit = request.args.get("limit", 50, type=int)
-    history = weather_agent.get_alert_history(user_id, limit)
-    return jsonify({"user_id": user_id, "alerts": history})
+    before = request.args.get("before") or None
+    try:
+        history = weather_agent.get_alert_history(user_id, limit, before)
+    except ValueError:
+        return jsonify({"error": "Invalid 'before' cursor; expected an ISO time, optionally followed by ',<id>'"}), 400
+    next_before = _history_cursor(history[-1]) if history and len(history) == limit else None
+    return jsonify({"user_id": user_id, "alerts": history, "next_before": next_before})
 
 @weather_agent_bp.route("/service/start", methods=["POST"])
 @require_admin